@@ -0,0 +1,78 @@
+"""Benchmark of saving mybinder.org archive launches: `save_launches` vs `save_launches_bulk`.
+
+It runs against a temporary sqlite database, so it doesn't touch the configured database:
+
+    python benchmarks/archive_ingestion.py --launches 50000 --repos 5000
+"""
+import os
+import sys
+import argparse
+import tempfile
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from binder_gallery import app, db  # noqa: E402
+from binder_gallery.models import BinderLaunch, Repo  # noqa: E402
+from binder_gallery.mybinder_archives import save_launches, save_launches_bulk  # noqa: E402
+
+SPECS = [
+    ('GitHub', 'org{i}/repo{i}/master'),
+    ('GitHub', 'org{i}/repo{i}.git/feature/branch'),
+    ('GitLab', 'group{i}%2Frepo{i}/master'),
+    ('Git', 'https%3A%2F%2Fgit.example.org%2Frepo{i}.git/6d61e5edfa4d2947b0ee8c1be8e79154'),
+    ('Gist', 'user{i}/256c3ad937af9ec7d4c65a29e5b6d454'),
+    ('Zenodo', '10.5281/zenodo.{i}'),
+]
+
+
+def get_frame(launches, repos, seed=0):
+    rng = np.random.RandomState(seed)
+    rows = []
+    start = pd.Timestamp('2019-06-12', tz='UTC')
+    minutes = np.sort(rng.randint(0, 24 * 60, launches))
+    for n, (i, spec_i) in enumerate(zip(rng.zipf(1.5, launches) % repos, rng.randint(0, len(SPECS), launches))):
+        provider, spec = SPECS[spec_i]
+        rows.append({'schema': 'binderhub.jupyter.org/launch', 'version': 3,
+                     'timestamp': start + pd.Timedelta(minutes=int(minutes[n])),
+                     'origin': 'gke.mybinder.org', 'provider': provider, 'spec': spec.format(i=i),
+                     'status': 'success'})
+    return pd.DataFrame(rows)
+
+
+def run(save, frame):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start = perf_counter()
+        save(frame, False)
+        duration = perf_counter() - start
+        assert BinderLaunch.query.count() == len(frame)
+        repos = sorted(Repo.query.with_entities(Repo.provider_namespace, Repo.last_ref).all())
+    return duration, repos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--launches', type=int, default=20000)
+    parser.add_argument('--repos', type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp_dir, 'benchmark.sqlite')
+    app.config['BACKGROUND_WORKERS'] = 0
+    frame = get_frame(args.launches, args.repos)
+
+    results = {}
+    for name, save in [('save_launches', save_launches), ('save_launches_bulk', save_launches_bulk)]:
+        duration, repos = run(save, frame)
+        results[name] = repos
+        print(f"{name:<20} {duration:8.2f} s {len(frame) / duration:10.0f} launches/s ({len(repos)} repos)")
+    assert results['save_launches'] == results['save_launches_bulk'], "bulk loader saved different repos"
+
+
+if __name__ == '__main__':
+    main()
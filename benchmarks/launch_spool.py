@@ -0,0 +1,89 @@
+"""Benchmark of sustained launch POSTs: a commit per launch vs write-behind mode with launch spool.
+
+It runs against a temporary sqlite database, so it doesn't touch the configured database:
+
+    python benchmarks/launch_spool.py --launches 5000 --clients 8
+
+Duration of write-behind mode includes saving all spooled launches into database.
+"""
+import os
+import sys
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from time import perf_counter, sleep
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from binder_gallery import app, db  # noqa: E402
+from binder_gallery.models import BinderLaunch, User  # noqa: E402
+from binder_gallery.launch_spool import get_spool_size  # noqa: E402
+
+
+def get_launches(count, repos):
+    start = datetime.utcnow() - timedelta(days=1)
+    return [{'schema': 'binderhub.jupyter.org/launch', 'version': 3,
+             'timestamp': (start + timedelta(seconds=i)).isoformat() + 'Z', 'origin': 'gke.mybinder.org',
+             'provider': 'GitHub', 'spec': f'org{i % repos}/repo{i % repos}/master', 'status': 'success'}
+            for i in range(count)]
+
+
+def post_launches(launches, clients, token):
+    url = app.config['BASE_URL'] + 'api/v1.0/launches'
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def post(chunk):
+        client = app.test_client()
+        for launch in chunk:
+            response = client.post(url, json=launch, headers=headers)
+            assert response.status_code in [201, 202], response.data
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(post, [launches[i::clients] for i in range(clients)]))
+
+
+def run(launches, clients, spool_path):
+    app.config['LAUNCH_SPOOL_PATH'] = spool_path
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        token = User(name='benchmark').encoded_token
+    start = perf_counter()
+    post_launches(launches, clients, token)
+    posted = perf_counter() - start
+    if spool_path:
+        # wait until flusher saves all launches
+        with app.app_context():
+            while get_spool_size():
+                sleep(0.01)
+    duration = perf_counter() - start
+    with app.app_context():
+        assert BinderLaunch.query.count() == len(launches)
+    return posted, duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--launches', type=int, default=2000)
+    parser.add_argument('--repos', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=8)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp_dir, 'benchmark.sqlite')
+    # sqlite allows one writer at a time, wait for the lock instead of failing
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 60}}
+    app.config['SERVER_NAME'] = None
+    app.logger.setLevel('WARNING')
+    launches = get_launches(args.launches, args.repos)
+
+    for name, spool_path in [('commit per launch', None),
+                             ('launch spool', os.path.join(tmp_dir, 'spool.sqlite'))]:
+        posted, duration = run(launches, args.clients, spool_path)
+        print(f"{name:<20} {len(launches) / posted:10.0f} launches/s posted "
+              f"{len(launches) / duration:10.0f} launches/s saved")
+
+
+if __name__ == '__main__':
+    main()
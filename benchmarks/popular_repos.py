@@ -0,0 +1,99 @@
+"""Benchmark of popular repos of "all" interval: ORM objects vs plain rows of `_get_popular_repos`.
+
+It runs against a temporary sqlite database, so it doesn't touch the configured database:
+
+    python benchmarks/popular_repos.py --repos 20000 --days 60
+"""
+import os
+import sys
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from binder_gallery import app, db  # noqa: E402
+from binder_gallery.models import Repo, DailyLaunchCount, get_namespace_fields  # noqa: E402
+from binder_gallery.utilities_db import _get_popular_repos, _get_popular_repos_subquery  # noqa: E402
+
+
+def get_popular_repos_orm(binder, from_dt, to_dt=None):
+    """Popular repos with Repo objects, as it was done before plain rows."""
+    subquery = _get_popular_repos_subquery(binder, from_dt, to_dt)
+    repos = Repo.query.filter(Repo.id == subquery.c.repo_id).add_columns(subquery.c.launch_count).all()
+
+    data = []
+    for repo, launch_count in repos:
+        org, repo_name = repo.repo_namespace
+        data.append([repo_name, org, repo.provider, repo.repo_url, repo.binder_url, repo.description,
+                     int(launch_count)])
+    data.sort(key=lambda x: x[-1], reverse=True)
+    return data
+
+
+def populate(repos, days, seed=0):
+    rng = np.random.RandomState(seed)
+    db.drop_all()
+    db.create_all()
+    db.session.execute(Repo.__table__.insert(),
+                       [dict(get_namespace_fields(f'gh/org{i}/repo{i}'), id=i, provider_namespace=f'gh/org{i}/repo{i}',
+                             description=f"Description of repo{i}", last_ref='master')
+                        for i in range(1, repos + 1)])
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    counts = []
+    for day in range(days):
+        # each day about a third of repos are launched
+        for repo_id in np.unique(rng.randint(1, repos + 1, repos // 3)):
+            counts.append({'repo_id': int(repo_id), 'origin': 'gke.mybinder.org',
+                           'bucket': start + timedelta(days=day), 'launch_count': int(rng.zipf(1.5) % 1000 + 1)})
+    db.session.execute(DailyLaunchCount.__table__.insert(), counts)
+    db.session.commit()
+    return len(counts)
+
+
+def measure(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        db.session.expire_all()
+        start = perf_counter()
+        data = func('all', None, None)
+        durations.append(perf_counter() - start)
+        db.session.remove()
+    db.session.expire_all()
+    tracemalloc.start()
+    data = func('all', None, None)
+    snapshot = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    db.session.remove()
+    return min(durations), peak, blocks, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repos', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp_dir, 'benchmark.sqlite')
+    with app.app_context():
+        rows = populate(args.repos, args.days)
+        print(f"{args.repos} repos, {rows} daily launch count rows")
+        results = {}
+        for name, func in [('orm objects', get_popular_repos_orm), ('plain rows', _get_popular_repos)]:
+            duration, peak, blocks, data = measure(func, args.repeat)
+            results[name] = data
+            print(f"{name:<12} {duration:8.3f} s {peak / 1024 / 1024:10.1f} MiB peak "
+                  f"{blocks:10d} memory blocks held after the query")
+    assert [list(r) for r in results['plain rows']] == results['orm objects'], "plain rows are different"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark of repo search: search index vs scanning repos with LIKE.
+
+It runs against a temporary sqlite database, so it doesn't touch the configured database:
+
+    python benchmarks/repo_search.py --repos 500000
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from binder_gallery import app, db, cache  # noqa: E402
+from binder_gallery.models import Repo  # noqa: E402
+from binder_gallery import repo_search  # noqa: E402
+from binder_gallery.repo_search import create_search_index, search_repos  # noqa: E402
+
+WORDS = ['jupyter', 'notebook', 'python', 'tutorial', 'data', 'analysis', 'machine', 'learning', 'course',
+         'workshop', 'statistics', 'climate', 'genomics', 'survey', 'text', 'mining', 'network', 'social']
+QUERIES = ['jupyter', 'tutorial', 'machine learning', 'org42', 'repo123456', 'climate survey notebook']
+
+
+def insert_repos(count):
+    rng = random.Random(0)
+    batch_size = 10000
+    for start in range(0, count, batch_size):
+        repos = []
+        for i in range(start, min(start + batch_size, count)):
+            words = rng.sample(WORDS, 2)
+            org, repo_name = f'org{i % 1000}', f'repo{i}-{words[0]}'
+            repos.append({'provider_namespace': f'gh/{org}/{repo_name}', 'provider': 'GitHub',
+                          'org': org, 'repo_name': repo_name, 'repo_url': f'https://github.com/{org}/{repo_name}',
+                          'description': ' '.join(rng.sample(WORDS, 4)),
+                          'launch_count': rng.randint(0, 1000)})
+        db.session.bulk_insert_mappings(Repo, repos)
+        db.session.commit()
+
+
+def run(queries, repeat):
+    """Returns median duration of each query in ms."""
+    durations = {}
+    for query in queries:
+        times = []
+        for _ in range(repeat):
+            # don't measure the memoized results
+            cache.clear()
+            start = perf_counter()
+            search_repos(query, 10)
+            times.append((perf_counter() - start) * 1000)
+        durations[query] = sorted(times)[len(times) // 2]
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repos', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp_dir, 'benchmark.sqlite')
+    app.config['SERVER_NAME'] = None
+    app.logger.setLevel('WARNING')
+
+    with app.app_context():
+        db.create_all()
+        insert_repos(args.repos)
+        results = {}
+        for name in ['scan (LIKE)', 'search index']:
+            if name == 'search index':
+                create_search_index(db.engine)
+            repo_search._has_search_table.clear()
+            results[name] = run(QUERIES, args.repeat)
+
+    print(f"{'query':<25}" + ''.join(f"{name:>16}" for name in results))
+    for query in QUERIES:
+        print(f"{query:<25}" + ''.join(f"{results[name][query]:>13.1f} ms" for name in results))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,3 @@
-import os
 from flask_caching import Cache
 from flask_sqlalchemy import SQLAlchemy
 from .flask_app import Flask
@@ -21,9 +20,8 @@ if not app.debug:
     app.wsgi_app = ProxyFix(app.wsgi_app)
 
 db = SQLAlchemy()
-project_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
-cache = Cache(config={'CACHE_TYPE': 'filesystem',
-                      'CACHE_DIR': os.path.join(project_dir, 'bg_cache')})
+# cache is configured with CACHE_* config values
+cache = Cache()
 
 
 def init_plugins():
@@ -41,6 +39,9 @@ def init_plugins():
     db.init_app(app)
 
     cache.init_app(app)
+    # collect hit/miss statistics of cache, they are displayed in admin
+    from binder_gallery.cache_backends import StatsCache
+    app.extensions['cache'][cache] = StatsCache(app.extensions['cache'][cache])
 
     # initialize flask-login
     import flask_login as login
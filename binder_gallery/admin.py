@@ -1,5 +1,7 @@
 import flask_login as login
-from flask import request, url_for, redirect, abort
+import os
+import re
+from flask import request, url_for, redirect, abort, send_from_directory
 from flask.helpers import get_debug_flag
 from flask_admin import AdminIndexView as BaseAdminIndexView, expose, helpers, Admin, BaseView
 from flask_admin.contrib.sqla import ModelView
@@ -7,6 +9,7 @@ from flask_admin.helpers import is_safe_url
 from wtforms import validators
 from .forms import LoginForm
 from .models import User, Repo, CreatedByGesis, FeaturedProject, BinderLaunch
+from .parquet_export import get_exported_files
 from . import app, db, cache
 
 DEBUG_FLAG = get_debug_flag()
@@ -90,7 +93,7 @@ class AdminIndexView(BaseAdminIndexView):
         return redirect(url_for('.index'))
 
 
-class CacheView(BaseView):
+class BaseAdminView(BaseView):
 
     def is_accessible(self):
         return login.current_user.is_authenticated
@@ -99,11 +102,46 @@ class CacheView(BaseView):
         # redirect to login page if user doesn't have access
         return redirect(url_for('admin.login_view', next=request.url))
 
+
+class CacheView(BaseAdminView):
+
     @expose('/')
     def index(self):
-        with app.app_context():
-            cache.clear()
-        return redirect(url_for('admin.index'))
+        return self.render('admin/cache.html', stats=cache.cache.get_stats(), keys=cache.cache.get_keys(),
+                           cache_type=app.config['CACHE_TYPE'])
+
+    @expose('/delete/', methods=('POST',))
+    def delete_view(self):
+        key = request.form.get('key', '').strip()
+        if key:
+            cache.delete(key)
+        return redirect(url_for('.index'))
+
+    @expose('/clear/', methods=('POST',))
+    def clear_view(self):
+        cache.clear()
+        return redirect(url_for('.index'))
+
+    @expose('/reset_stats/', methods=('POST',))
+    def reset_stats_view(self):
+        cache.cache.reset_stats()
+        return redirect(url_for('.index'))
+
+
+class ParquetExportView(BaseAdminView):
+
+    @expose('/')
+    def index(self):
+        files = get_exported_files(app.config['PARQUET_EXPORT_DIR'])
+        return self.render('admin/parquet_export.html', files=files)
+
+    @expose('/download/<year>/<file_name>')
+    def download(self, year, file_name):
+        # send_from_directory only checks file_name, year must be one of the year directories
+        if re.fullmatch(r'year=\d{4}', year) is None:
+            abort(404)
+        return send_from_directory(os.path.join(app.config['PARQUET_EXPORT_DIR'], year), file_name,
+                                   as_attachment=True)
 
 
 admin = Admin(app, name='Binder Gallery', index_view=AdminIndexView(),
@@ -114,4 +152,5 @@ admin.add_view(RepoModelView(Repo, db.session))
 admin.add_view(CreatedByGesisModelView(CreatedByGesis, db.session))
 admin.add_view(FeaturedProjectModelView(FeaturedProject, db.session))
 admin.add_view(BinderLaunchModelView(BinderLaunch, db.session))
-admin.add_view(CacheView(name='Clear Cache', endpoint='clear_cache'))
+admin.add_view(CacheView(name='Cache', endpoint='cache'))
+admin.add_view(ParquetExportView(name='Launches Export', endpoint='parquet_export'))
@@ -1,13 +1,20 @@
-from datetime import datetime
-from flask import abort, make_response, request, Blueprint, jsonify, url_for
+import io
+import csv
+import json
+from datetime import datetime, date, timedelta
+from flask import abort, make_response, request, Blueprint, jsonify, url_for, Response, stream_with_context
 from flask_restplus import Api, Resource, marshal, Namespace, reqparse, inputs
-from flask_restplus.fields import String, Integer, DateTime
-from .utilities_db import get_launches_paginated
+from flask_restplus.fields import String, Integer, DateTime, List, Nested
+from .utilities_db import get_launches_paginated, get_launches_after, encode_cursor, add_launches, \
+    validate_launch_spec, iter_launch_rows, get_top_repos, get_trending_repos, get_origin_counts, get_launch_stats, \
+    LAUNCH_EXPORT_COLUMNS
 from . import app, db
-from .models import BinderLaunch, User, Repo
+from .models import BinderLaunch, Repo, OriginLaunchCount, User
+from .descriptions import enqueue_description_refresh
+from .launch_spool import spool_launches, is_enabled as is_spool_enabled
+from .repo_search import search_repos, get_search_terms, MIN_TERM_LENGTH
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from sqlalchemy import func
 
 limiter = Limiter(app, key_func=get_remote_address)
 
@@ -40,6 +47,12 @@ api = GalleryApi(blueprint, version=version,
 
 launch_ns = Namespace('launches', description='Launch events related operations')
 api.add_namespace(launch_ns, path='/launches')
+popular_ns = Namespace('popular', description='Popular repos related operations')
+api.add_namespace(popular_ns, path='/popular')
+stats_ns = Namespace('stats', description='Launch statistics related operations')
+api.add_namespace(stats_ns, path='/stats')
+repos_ns = Namespace('repos', description='Repo related operations')
+api.add_namespace(repos_ns, path='/repos')
 
 app.register_blueprint(blueprint)
 
@@ -59,10 +72,98 @@ launch_model = api.model('Launch', {
     # 'repo_description': String(),
 })
 
+popular_repo_model = api.model('PopularRepo', {
+    'repo_name': String(example='repo'),
+    'org': String(example='user'),
+    'provider': String(example='GitHub'),
+    'repo_url': String(example='https://github.com/user/repo'),
+    'binder_url': String(example='https://notebooks.gesis.org/binder/v2/gh/user/repo/master'),
+    'description': String(),
+    'launch_count': Integer(example=42),
+})
+origin_count_model = api.model('OriginCount', {
+    'origin': String(example='notebooks.gesis.org'),
+    'count': Integer(example=42),
+})
+
+repo_model = api.model('Repo', {
+    'provider_namespace': String(example='gh/user/repo'),
+    'provider': String(example='GitHub'),
+    'org': String(example='user'),
+    'repo_name': String(example='repo'),
+    'repo_url': String(example='https://github.com/user/repo'),
+    'binder_url': String(example='https://notebooks.gesis.org/binder/v2/gh/user/repo/master'),
+    'description': String(),
+    'launch_count': Integer(example=42),
+    'first_launch': DateTime(),
+    'last_launch': DateTime(),
+    'origins': List(Nested(origin_count_model), description="launch count per origin"),
+})
+
+stats_bucket_model = api.model('StatsBucket', {
+    'bucket': DateTime(description="beginning of the bucket in UTC"),
+    'launch_count': Integer(example=42),
+})
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        row = dict(zip(LAUNCH_EXPORT_COLUMNS, row))
+        row['timestamp'] = row['timestamp'].isoformat()
+        # same as launch_model
+        row['version'] = int(row['version']) if str(row['version']).isdigit() else row['version']
+        yield json.dumps(row) + '\n'
+
+
+def iter_csv(rows, batch_size=1000):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(LAUNCH_EXPORT_COLUMNS)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+# format: (serializer, mimetype)
+EXPORT_FORMATS = {
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+    'csv': (iter_csv, 'text/csv'),
+}
+
 # swagger documentation
 dt_description = "Date and time in ISO 8601 format in UTC, e.g. 2019-05-31T16:17:56.946703"
-page_description = "Default is 1 (first page) and each page contains max 100 items"
+page_description = "Default is 1 (first page) and each page contains max 100 items. " \
+                   "Prefer cursor for next pages, it is faster"
+cursor_description = "next_cursor of previous page. Pages are ordered by timestamp and id, " \
+                     "each page contains max 100 items"
 origin_description = "Default is all origins"
+repo_description = "Provider prefix and namespace of a repo, e.g. gh/user/repo"
+limit_description = "Number of top repos, default is 10, max is 100"
+
+
+def parse_datetime_range(from_datetime, to_datetime=None):
+    """Parses datetimes in ISO 8601 format, timezone "Z" is ignored.
+    Raises ValueError if a value is not valid."""
+    if from_datetime.endswith("Z"):
+        from_datetime = from_datetime.rsplit('Z', 1)[0]
+    from_datetime = datetime.fromisoformat(from_datetime)
+    if to_datetime is not None:
+        if to_datetime.endswith("Z"):
+            to_datetime = to_datetime.rsplit('Z', 1)[0]
+        to_datetime = datetime.fromisoformat(to_datetime)
+    return from_datetime, to_datetime
+
+
+def get_origin_arg():
+    origin = request.args.get("origin")
+    if origin == " ":
+        # origin "" is for launches of GESIS Binder before version 3 (without origin)
+        origin = ""
+    return origin
 
 
 @launch_ns.route('/<string:from_datetime>/<string:to_datetime>', methods=['GET'])
@@ -74,28 +175,31 @@ class RepoLaunchesBase(Resource):
 
     @launch_ns.doc(params={'from_datetime': dt_description,
                            'to_datetime': dt_description},
-                   responses={200: 'Success', 400: 'DateTime Value Error', 429: 'Too Many Requests' })
+                   responses={200: 'Success', 400: 'DateTime or Cursor Value Error', 429: 'Too Many Requests' })
     @launch_ns.param('origin', origin_description)
     @launch_ns.param('page', page_description)
+    @launch_ns.param('cursor', cursor_description)
     def get(self, from_datetime, to_datetime=None):
         try:
-            if from_datetime.endswith("Z"):
-                from_datetime = from_datetime.rsplit('Z', 1)[0]
-            from_datetime = datetime.fromisoformat(from_datetime)
-            if to_datetime is not None:
-                if to_datetime.endswith("Z"):
-                    to_datetime = to_datetime.rsplit('Z', 1)[0]
-                to_datetime = datetime.fromisoformat(to_datetime)
+            from_datetime, to_datetime = parse_datetime_range(from_datetime, to_datetime)
         except ValueError as e:
             return {"status": "error", "message": str(e)}, 400
-        origin = request.args.get("origin")
-        if origin == " ":
-            # origin "" is for launches of GESIS Binder before version 3 (without origin)
-            origin = ""
-        launches = get_launches_paginated(from_datetime, to_datetime, origin)
-        next_page = launches.next_num
-        launches = launches.items
-        return {"status": "success", "next_page": next_page,
+        origin = get_origin_arg()
+        cursor = request.args.get("cursor")
+        if request.args.get("page") is not None and cursor is None:
+            # offset pagination
+            launches = get_launches_paginated(from_datetime, to_datetime, origin)
+            next_page = launches.next_num
+            launches = launches.items
+            next_cursor = encode_cursor(launches[-1]) if next_page else None
+        else:
+            try:
+                launches, next_cursor = get_launches_after(from_datetime, to_datetime, origin, cursor)
+            except ValueError as e:
+                return {"status": "error", "message": str(e)}, 400
+            # for clients which follow next_page
+            next_page = 2 if cursor is None and next_cursor else None
+        return {"status": "success", "next_page": next_page, "next_cursor": next_cursor,
                 "launches": marshal(launches, launch_model, skip_none=True)}, 200
 
 
@@ -110,71 +214,171 @@ launch_parser.add_argument('spec', type=str, required=True)
 launch_parser.add_argument('status', type=str, required=True)
 
 
+def validate_token():
+    """Aborts with 403 if request has no valid Bearer token with launch permission."""
+    token = request.headers.get('Authorization')
+    if not token:
+        abort(make_response(jsonify(status="error", message="Authorization token is required."), 403))
+    token = token.replace('Bearer ', '', 1)
+    if User.validate_token(token) is not True:
+        abort(make_response(jsonify(status="error", message="Authorization token is not valid."), 403))
+
+
+def create_launch(data):
+    # remove timezone information, we assume it is UTC
+    # otherwise it is converted into local timezone and saved into database
+    timestamp = data['timestamp'].replace(tzinfo=None)
+    # Trim timestamp to minute resolution before saving
+    # Should hopefully make it harder to de-anonymize users by observing timing
+    # ref: https://github.com/jupyterhub/mybinder.org-deploy/blob/master/images/analytics-publisher/archiver.py
+    timestamp = timestamp.replace(second=0, microsecond=0)
+    return BinderLaunch(schema=data['schema'],
+                        version=data['version'],
+                        timestamp=timestamp,
+                        origin=data['origin'],
+                        provider=data['provider'],
+                        spec=data['spec'],
+                        status=data['status'])
+
+
+def get_bulk_items():
+    """Returns launch items of a bulk request body, which is either a JSON array or JSON Lines."""
+    body = request.get_data(as_text=True).strip()
+    if body.startswith('['):
+        items = json.loads(body)
+    else:
+        items = [json.loads(line) for line in body.splitlines() if line.strip()]
+    if not all(isinstance(item, dict) for item in items):
+        raise ValueError("each launch must be a JSON object")
+    return items
+
+
+def parse_launch_item(item):
+    """Validates a launch item of a bulk request with the arguments of `launch_parser`."""
+    data = {}
+    for arg in launch_parser.args:
+        value = item.get(arg.name)
+        if value is None:
+            if arg.required:
+                raise ValueError(f"Missing required parameter {arg.name}")
+            data[arg.name] = None
+            continue
+        try:
+            data[arg.name] = arg.type(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{arg.name}: {e}")
+    return data
+
+
 @launch_ns.route('/<string:from_datetime>/', methods=['GET'])
 @launch_ns.route('', methods=['POST'])
 class RepoLaunches(RepoLaunchesBase):
 
     @launch_ns.doc(params={'from_datetime': {'description': dt_description}},
-                   responses={200: 'Success', 400: 'DateTime Value Error', 429: 'Too Many Requests'})
+                   responses={200: 'Success', 400: 'DateTime or Cursor Value Error', 429: 'Too Many Requests'})
     @launch_ns.param('origin', origin_description)
     @launch_ns.param('page', page_description)
+    @launch_ns.param('cursor', cursor_description)
     def get(self, from_datetime):
         return super().get(from_datetime)
 
     @launch_ns.doc(security='apikey',
                    body=launch_model,
-                   responses={403: 'Not Authorized', 400: 'Launch Data Error', 201: 'Success'})
+                   responses={403: 'Not Authorized', 400: 'Launch Data Error', 201: 'Success',
+                              202: 'Accepted, launch will be saved in write-behind mode'})
     def post(self):
         # require Bearer token authentication for creating new launch entry
-        token = request.headers.get('Authorization')
-        if token:
-            token = token.replace('Bearer ', '', 1)
-            if User.validate_token(token) is True:
-                data = launch_parser.parse_args()
-                # remove timezone information, we assume it is UTC
-                # otherwise it is converted into local timezone and saved into database
-                timestamp = data['timestamp'].replace(tzinfo=None)
-                # Trim timestamp to minute resolution before saving
-                # Should hopefully make it harder to de-anonymize users by observing timing
-                # ref: https://github.com/jupyterhub/mybinder.org-deploy/blob/master/images/analytics-publisher/archiver.py
-                timestamp = timestamp.replace(second=0, microsecond=0)
-                launch = BinderLaunch(schema=data['schema'],
-                                      version=data['version'],
-                                      timestamp=timestamp,
-                                      origin=data['origin'],
-                                      provider=data['provider'],
-                                      spec=data['spec'],
-                                      status=data['status'])
-
-                provider_spec = launch.provider_spec
-                app.logger.info(f"New binder launch {provider_spec} at {launch.timestamp} on {launch.origin} - "
-                                f"{launch.schema} {launch.version} {launch.status}")
-
-                provider_namespace = launch.provider_namespace
-                repo = Repo.query.filter_by(provider_namespace=provider_namespace).first()
-                description = launch.get_repo_description()
-                if launch.provider_prefix in ["zenodo", "figshare", "hydroshare", "dataverse"]:
-                    last_ref = ""
-                else:
-                    last_ref = launch.spec.split('/')[-1]
-                if repo:
-                    repo.launches.append(launch)
-                    repo.description = description
-                    repo.last_ref = last_ref
-                else:
-                    repo = Repo(provider_namespace=provider_namespace, description=description,
-                                launches=[launch], last_ref=last_ref)
-                    db.session.add(repo)
-                db.session.add(launch)
-                db.session.commit()
-            else:
-                abort(make_response(jsonify(status="error", message="Authorization token is not valid."), 403))
-        else:
-            abort(make_response(jsonify(status="error", message="Authorization token is required."), 403))
+        validate_token()
+        data = launch_parser.parse_args()
+        launch = create_launch(data)
+        try:
+            validate_launch_spec(launch)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        provider_spec = launch.provider_spec
+        app.logger.info(f"New binder launch {provider_spec} at {launch.timestamp} on {launch.origin} - "
+                        f"{launch.schema} {launch.version} {launch.status}")
+        if is_spool_enabled():
+            spool_launches([launch])
+            return {"status": 'accepted'}, 202
+        repos = add_launches([launch])
+        db.session.commit()
+        enqueue_description_refresh(repos)
 
         return {"status": 'success'}, 201
 
 
+@launch_ns.route('/bulk', methods=['POST'])
+class RepoLaunchesBulk(Resource):
+
+    @launch_ns.doc(security='apikey',
+                   body=[launch_model],
+                   description="Body is a JSON array of launches or JSON Lines (one launch per line). "
+                               f"Max {app.config.get('BULK_MAX_LAUNCHES', 1000)} launches per request.",
+                   responses={403: 'Not Authorized', 400: 'Launch Data Error', 413: 'Too Many Launches',
+                              201: 'Success', 202: 'Accepted, launches will be saved in write-behind mode'})
+    def post(self):
+        validate_token()
+        try:
+            items = get_bulk_items()
+        except ValueError as e:
+            return {"status": "error", "message": f"Invalid body: {e}"}, 400
+        max_launches = app.config.get('BULK_MAX_LAUNCHES', 1000)
+        if len(items) > max_launches:
+            return {"status": "error", "message": f"Max {max_launches} launches are allowed per request."}, 413
+
+        launches = []
+        results = []
+        for item in items:
+            try:
+                launch = create_launch(parse_launch_item(item))
+                validate_launch_spec(launch)
+            except Exception as e:
+                results.append({"status": "error", "message": str(e)})
+            else:
+                launches.append(launch)
+                results.append({"status": "success"})
+
+        if launches and is_spool_enabled():
+            spool_launches(launches)
+            app.logger.info(f"New binder launches: {len(launches)} of {len(items)} launches are spooled")
+            return {"status": "accepted", "launches": results}, 202
+        if launches:
+            launches.sort(key=lambda l: l.timestamp)
+            repos = add_launches(launches)
+            db.session.commit()
+            enqueue_description_refresh(repos)
+            app.logger.info(f"New binder launches: {len(launches)} of {len(items)} launches are saved")
+            return {"status": "success", "launches": results}, 201
+        return {"status": "error", "message": "No valid launch in request.", "launches": results}, 400
+
+
+@launch_ns.route('/export/<string:from_datetime>/<string:to_datetime>', methods=['GET'])
+@launch_ns.route('/export/<string:from_datetime>/', methods=['GET'])
+class RepoLaunchesExport(Resource):
+    decorators = [limiter.limit("10/minute", methods=['GET'])]
+
+    @launch_ns.doc(params={'from_datetime': dt_description,
+                           'to_datetime': dt_description + ". Default is now"},
+                   responses={200: 'Success', 400: 'DateTime or Format Value Error', 429: 'Too Many Requests'})
+    @launch_ns.param('origin', origin_description)
+    @launch_ns.param('format', "ndjson (default) or csv")
+    def get(self, from_datetime, to_datetime=None):
+        """Streams all launches in given time range ordered by timestamp in one response."""
+        try:
+            from_datetime, to_datetime = parse_datetime_range(from_datetime, to_datetime)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        export_format = request.args.get("format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            return {"status": "error", "message": f"Format must be one of {list(EXPORT_FORMATS)}."}, 400
+        rows = iter_launch_rows(from_datetime, to_datetime, get_origin_arg())
+        serialize, mimetype = EXPORT_FORMATS[export_format]
+        file_name = f"launches_{from_datetime.isoformat()}_{(to_datetime or datetime.utcnow()).isoformat()}"
+        return Response(stream_with_context(serialize(rows)), mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename="{file_name}.{export_format}"'})
+
+
 @launch_ns.route('/origins/', methods=['GET'])
 class Origins(Resource):
     # With class based approach to defining view function, the regular method of decorating a view function to apply a
@@ -182,17 +386,236 @@ class Origins(Resource):
     # limit only get methods
     decorators = [limiter.limit("100/minute;2/second", methods=['GET'])]
 
-    @launch_ns.doc(responses={200: 'Success', 429: 'Too Many Requests' })
+    @launch_ns.doc(responses={200: 'Success', 400: 'Date Value Error', 429: 'Too Many Requests'})
     @launch_ns.param('count', "Default is False. Count of launches per origin")
+    @launch_ns.param('from', "First day (YYYY-MM-DD), only origins with launches since then are listed. "
+                             "Counts of a time range don't include launches of unknown repos.")
+    @launch_ns.param('to', "Last day (YYYY-MM-DD), inclusive. Default is today")
     def get(self):
+        try:
+            from_date, to_date = [date.fromisoformat(request.args[arg]) if request.args.get(arg) else None
+                                  for arg in ['from', 'to']]
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        if from_date is not None and to_date is not None and from_date > to_date:
+            return {"status": "error", "message": "from must not be after to"}, 400
         origins = []
         count = request.args.get("count")
-        if count and count in ['True', 'true', '1']:
-            _origins = BinderLaunch.query.with_entities(BinderLaunch.origin, func.count(BinderLaunch.origin)).group_by(BinderLaunch.origin).all()
-            for origin, count in _origins:
-                origins.append({'origin': origin, 'count': count})
-        else:
-            _origins = BinderLaunch.query.with_entities(BinderLaunch.origin).distinct().all()
-            for origin in _origins:
-                origins.append({'origin': origin[0]})
+        for origin, launch_count in get_origin_counts(from_date, to_date):
+            if count and count in ['True', 'true', '1']:
+                origins.append({'origin': origin, 'count': launch_count})
+            else:
+                origins.append({'origin': origin})
         return {"status": "success", "origins": origins}, 200
+
+
+def get_limit_arg():
+    """Returns limit query parameter. Raises ValueError if it is not valid."""
+    limit = int(request.args.get('limit', 10))
+    if not 0 < limit <= 100:
+        raise ValueError("limit must be between 1 and 100")
+    return limit
+
+
+@popular_ns.route('/<string:binder>/<string:time_range>', methods=['GET'])
+class PopularRepos(Resource):
+    decorators = [limiter.limit("100/minute;2/second", methods=['GET'])]
+
+    @popular_ns.doc(params={'binder': "Binder name, e.g. mybinder or all",
+                            'time_range': "Time range, e.g. 24h, 7d or all"},
+                    responses={200: 'Success', 400: 'Limit Value Error', 404: 'Binder or Time Range Not Found',
+                               429: 'Too Many Requests'})
+    @popular_ns.param('limit', limit_description)
+    def get(self, binder, time_range):
+        if (binder not in app.binder_origins and binder != 'all') or time_range not in app.detail_pages:
+            return {"status": "error", "message": f"{binder}/{time_range} is not found"}, 404
+        try:
+            limit = get_limit_arg()
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        top_repos, repos_count, total_launches = get_top_repos(binder, time_range, limit)
+        repos = [r._asdict() for r in top_repos]
+        return {"status": "success", "repos_count": repos_count, "launch_count": total_launches,
+                "repos": marshal(repos, popular_repo_model)}, 200
+
+
+@popular_ns.route('/trending', methods=['GET'])
+class TrendingRepos(Resource):
+    decorators = [limiter.limit("100/minute;2/second", methods=['GET'])]
+
+    @popular_ns.doc(responses={200: 'Success', 400: 'Limit Value Error', 429: 'Too Many Requests'})
+    @popular_ns.param('limit', limit_description)
+    def get(self):
+        """Repos with most launches recently, weight of a launch decays exponentially over time.
+        launch_count is the total launch count of a repo."""
+        try:
+            limit = get_limit_arg()
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        repos = [r._asdict() for r in get_trending_repos(limit)]
+        return {"status": "success", "repos": marshal(repos, popular_repo_model)}, 200
+
+
+@stats_ns.route('/launches/<string:bucket>/<string:from_datetime>/<string:to_datetime>', methods=['GET'])
+@stats_ns.route('/launches/<string:bucket>/<string:from_datetime>/', methods=['GET'])
+class LaunchStats(Resource):
+    decorators = [limiter.limit("100/minute;2/second", methods=['GET'])]
+
+    @stats_ns.doc(params={'bucket': "hour, day, week (starts on Monday) or month",
+                          'from_datetime': dt_description,
+                          'to_datetime': dt_description + ". Default is now"},
+                  responses={200: 'Success', 400: 'DateTime or Bucket Value Error', 404: 'Repo Not Found',
+                             429: 'Too Many Requests'})
+    @stats_ns.param('origin', origin_description)
+    @stats_ns.param('provider', "Provider name, e.g. GitHub. Default is all providers")
+    @stats_ns.param('repo', repo_description + ". Default is all repos")
+    def get(self, bucket, from_datetime, to_datetime=None):
+        """Launch counts per bucket in given time range, buckets of both ends are included.
+        Launches of unknown repos are not counted."""
+        if bucket not in ['hour', 'day', 'week', 'month']:
+            return {"status": "error", "message": "Bucket must be one of hour, day, week or month"}, 400
+        try:
+            from_datetime, to_datetime = parse_datetime_range(from_datetime, to_datetime)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        repo_id = None
+        provider_namespace = request.args.get("repo")
+        if provider_namespace:
+            repo = Repo.query.with_entities(Repo.id).filter_by(provider_namespace=provider_namespace).first()
+            if repo is None:
+                return {"status": "error", "message": f"Repo {provider_namespace} is not found"}, 404
+            repo_id = repo[0]
+        try:
+            stats = get_launch_stats(bucket, from_datetime, to_datetime, get_origin_arg(),
+                                     request.args.get("provider") or None, repo_id)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        launches = [{'bucket': b, 'launch_count': launch_count} for b, launch_count in stats]
+        return {"status": "success", "bucket": bucket,
+                "launch_count": sum(launch_count for _, launch_count in stats),
+                "launches": marshal(launches, stats_bucket_model)}, 200
+
+
+@repos_ns.route('/search', methods=['GET'])
+class RepoSearch(Resource):
+    decorators = [limiter.limit("100/minute;2/second", methods=['GET'])]
+
+    @repos_ns.doc(responses={200: 'Success', 400: 'Query or Limit Value Error', 429: 'Too Many Requests'})
+    @repos_ns.param('q', "Words to search in provider, org, repo name and description of repos")
+    @repos_ns.param('limit', "Number of repos, default is 10, max is 100")
+    def get(self):
+        """Repos which contain all words of the query, ordered by total launch count.
+        launch_count is the total launch count of a repo."""
+        query = request.args.get('q', '')
+        if not get_search_terms(query):
+            return {"status": "error",
+                    "message": f"q must have a word with at least {MIN_TERM_LENGTH} characters"}, 400
+        try:
+            limit = get_limit_arg()
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        repos = [r._asdict() for r in search_repos(query, limit)]
+        return {"status": "success", "repos": marshal(repos, popular_repo_model)}, 200
+
+
+def get_repo_arg_or_404():
+    """Returns repo of repo query parameter.
+    It is a query parameter, because namespaces can contain "/" and end with e.g. "/launches".
+    Aborts with 400 if it is not given and with 404 if there is no repo with given provider_namespace."""
+    provider_namespace = request.args.get("repo")
+    if not provider_namespace:
+        abort(make_response(jsonify(status="error", message="repo is required"), 400))
+    repo = Repo.query.filter_by(provider_namespace=provider_namespace).first()
+    if repo is None:
+        abort(make_response(jsonify(status="error", message=f"Repo {provider_namespace} is not found"), 404))
+    return repo
+
+
+def get_datetime_range_args():
+    """Returns from and to query parameters as datetimes, None if they are not given.
+    Raises ValueError if a value is not valid."""
+    from_datetime, to_datetime = [parse_datetime_range(request.args[arg])[0] if request.args.get(arg) else None
+                                  for arg in ['from', 'to']]
+    return from_datetime, to_datetime
+
+
+@repos_ns.route('/', methods=['GET'])
+class RepoDetail(Resource):
+    decorators = [limiter.limit("100/minute;2/second", methods=['GET'])]
+
+    @repos_ns.doc(responses={200: 'Success', 400: 'Repo Missing', 404: 'Repo Not Found', 429: 'Too Many Requests'})
+    @repos_ns.param('repo', repo_description)
+    def get(self):
+        """Metadata and launch counters of a repo."""
+        repo = get_repo_arg_or_404()
+        origins = OriginLaunchCount.query.\
+            with_entities(OriginLaunchCount.origin, OriginLaunchCount.launch_count).\
+            filter_by(repo_id=repo.id).\
+            order_by(OriginLaunchCount.origin).\
+            all()
+        repo_data = marshal(repo, repo_model)
+        repo_data['origins'] = [{'origin': origin, 'count': count} for origin, count in origins]
+        return {"status": "success", "repo": repo_data}, 200
+
+
+@repos_ns.route('/launches', methods=['GET'])
+class RepoLaunchHistory(Resource):
+    decorators = [limiter.limit("100/minute;2/second", methods=['GET'])]
+
+    @repos_ns.doc(responses={200: 'Success', 400: 'Repo Missing or DateTime or Cursor Value Error',
+                             404: 'Repo Not Found', 429: 'Too Many Requests'})
+    @repos_ns.param('repo', repo_description)
+    @repos_ns.param('from', dt_description + ". Default is first launch of the repo")
+    @repos_ns.param('to', dt_description + ". Default is now")
+    @repos_ns.param('origin', origin_description)
+    @repos_ns.param('cursor', cursor_description)
+    def get(self):
+        """Launches of a repo ordered by timestamp, with keyset pagination."""
+        repo = get_repo_arg_or_404()
+        try:
+            from_datetime, to_datetime = get_datetime_range_args()
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        from_datetime = from_datetime or repo.first_launch
+        if from_datetime is None:
+            # repo has no launches
+            return {"status": "success", "next_cursor": None, "launches": []}, 200
+        try:
+            launches, next_cursor = get_launches_after(from_datetime, to_datetime, get_origin_arg(),
+                                                       request.args.get("cursor"), repo_id=repo.id)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        return {"status": "success", "next_cursor": next_cursor,
+                "launches": marshal(launches, launch_model, skip_none=True)}, 200
+
+
+@repos_ns.route('/launches/daily', methods=['GET'])
+class RepoDailyLaunches(Resource):
+    decorators = [limiter.limit("100/minute;2/second", methods=['GET'])]
+
+    @repos_ns.doc(responses={200: 'Success', 400: 'Repo Missing or DateTime Value Error', 404: 'Repo Not Found',
+                             429: 'Too Many Requests'})
+    @repos_ns.param('repo', repo_description)
+    @repos_ns.param('from', dt_description + ". Default is first launch of the repo, "
+                                             f"max {app.config['STATS_MAX_BUCKETS']} days ago")
+    @repos_ns.param('to', dt_description + ". Default is now")
+    @repos_ns.param('origin', origin_description)
+    def get(self):
+        """Launch counts of a repo per day, days of both ends are included."""
+        repo = get_repo_arg_or_404()
+        try:
+            from_datetime, to_datetime = get_datetime_range_args()
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        if from_datetime is None:
+            from_datetime = datetime.utcnow() - timedelta(days=app.config['STATS_MAX_BUCKETS'] - 1)
+            if repo.first_launch is not None:
+                from_datetime = max(from_datetime, repo.first_launch)
+        try:
+            stats = get_launch_stats('day', from_datetime, to_datetime, get_origin_arg(), repo_id=repo.id)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+        launches = [{'bucket': b, 'launch_count': launch_count} for b, launch_count in stats]
+        return {"status": "success", "bucket": "day",
+                "launch_count": sum(launch_count for _, launch_count in stats),
+                "launches": marshal(launches, stats_bucket_model)}, 200
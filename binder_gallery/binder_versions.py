@@ -0,0 +1,100 @@
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Lock
+from . import app, cache
+from .tasks import submit
+
+CACHE_KEY = 'binder_versions'
+
+_lock = Lock()
+_refreshing = False
+# circuit breaker state of this process: binder name -> [number of consecutive failures, open until]
+_failures = {}
+
+
+def _is_open(name, now):
+    failures, open_until = _failures.get(name, [0, None])
+    return open_until is not None and now < open_until
+
+
+def _record_result(name, success, now):
+    if success:
+        _failures.pop(name, None)
+        return
+    failure = _failures.setdefault(name, [0, None])
+    failure[0] += 1
+    if failure[0] >= app.config['BINDER_VERSIONS_MAX_FAILURES']:
+        # don't try this binder again until retry time
+        failure[1] = now + timedelta(seconds=app.config['BINDER_VERSIONS_RETRY_AFTER'])
+
+
+def fetch_versions(binder):
+    """Returns versions info of given binder or None if fetching fails."""
+    try:
+        response = requests.get(binder['url'] + '/versions', timeout=app.config['BINDER_VERSIONS_TIMEOUT'])
+        if response.status_code == 200:
+            versions = response.json()
+            return f"BinderHub {versions['binderhub']} with {versions['builder']}"
+        app.logger.error(f"Error: fetching version of {binder['name']} failed: {response.status_code}")
+    except Exception as e:
+        app.logger.error(f"Error: fetching version of {binder['name']} failed: {e}")
+    return None
+
+
+def refresh_binder_versions():
+    """Fetches versions of all binders concurrently and saves them into cache.
+    Binders which failed BINDER_VERSIONS_MAX_FAILURES times in a row are skipped
+    for BINDER_VERSIONS_RETRY_AFTER seconds.
+    """
+    global _refreshing
+    try:
+        now = datetime.utcnow()
+        cached = cache.get(CACHE_KEY) or {}
+        versions = dict(cached.get('versions', {}))
+        with _lock:
+            binders = [b for b in app.binders if not _is_open(b['name'], now)]
+        if binders:
+            with ThreadPoolExecutor(max_workers=len(binders)) as executor:
+                results = list(executor.map(fetch_versions, binders))
+            with _lock:
+                for binder, result in zip(binders, results):
+                    _record_result(binder['name'], result is not None, now)
+                    if result is not None:
+                        versions[binder['name']] = result
+        # if fetching fails, last fetched version info (of that binder) is kept
+        cache.set(CACHE_KEY, {'fetched_at': now, 'versions': versions}, timeout=0)
+    finally:
+        with _lock:
+            _refreshing = False
+
+
+def get_binder_versions(binders):
+    """Returns copy of binders with last known versions info.
+    If versions info is older than BINDER_VERSIONS_TTL seconds, it is refreshed in background,
+    so requests never wait for binders.
+    """
+    global _refreshing
+    cached = cache.get(CACHE_KEY) or {}
+    fetched_at = cached.get('fetched_at')
+    ttl = timedelta(seconds=app.config['BINDER_VERSIONS_TTL'])
+    if fetched_at is None or datetime.utcnow() - fetched_at >= ttl:
+        with _lock:
+            refresh = not _refreshing
+            _refreshing = True
+        if refresh:
+            submit(refresh_binder_versions)
+
+    versions = cached.get('versions', {})
+    binders = [dict(b) for b in binders]
+    main_versions = None
+    for binder in binders:
+        binder['versions'] = versions.get(binder['name'], binder['versions'])
+        if binder.get('main', 'false') == 'true' and binder['name'] in versions:
+            # get versions of main binder. other binders will be checked against this to decide if up-to-date
+            main_versions = binder['versions']
+    # check if up-to-date
+    for binder in binders:
+        if main_versions is not None and binder.get('main', 'false') != 'true' and binder['versions'] == main_versions:
+            binder['versions'] = binder['versions'] + '.'
+    return binders
@@ -0,0 +1,171 @@
+import pickle
+from collections import OrderedDict
+from threading import Lock
+from time import time, perf_counter
+from flask_caching.backends.base import BaseCache
+
+
+class LRUCache(BaseCache):
+    """Thread-safe in-process cache, which keeps at most `threshold` items.
+    When it is full, the least recently used item is deleted.
+    """
+
+    def __init__(self, threshold=500, default_timeout=300):
+        super().__init__(default_timeout)
+        self._cache = OrderedDict()
+        self._threshold = threshold
+        self._lock = Lock()
+
+    def _normalize_timeout(self, timeout):
+        timeout = super()._normalize_timeout(timeout)
+        if timeout > 0:
+            timeout = time() + timeout
+        return timeout
+
+    def _get_item(self, key):
+        expires, value = self._cache[key]
+        if expires != 0 and expires <= time():
+            del self._cache[key]
+            raise KeyError(key)
+        self._cache.move_to_end(key)
+        return value
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._get_item(key)
+            except KeyError:
+                return None
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout=None):
+        item = (self._normalize_timeout(timeout), pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self._cache[key] = item
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._threshold:
+                self._cache.popitem(last=False)
+        return True
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            try:
+                self._get_item(key)
+                return False
+            except KeyError:
+                pass
+        return self.set(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            return self._cache.pop(key, None) is not None
+
+    def has(self, key):
+        with self._lock:
+            try:
+                self._get_item(key)
+                return True
+            except KeyError:
+                return False
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+        return True
+
+    def keys(self):
+        with self._lock:
+            return list(self._cache.keys())
+
+
+def lru(app, config, args, kwargs):
+    """Factory of LRUCache for CACHE_TYPE "binder_gallery.cache_backends.lru"."""
+    kwargs.update(dict(threshold=config["CACHE_THRESHOLD"]))
+    return LRUCache(*args, **kwargs)
+
+
+class StatsCache(object):
+    """Wraps a cache backend and counts hits, misses and time spent for each operation.
+    Statistics are kept per process.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = Lock()
+        self.reset_stats()
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            # operation -> [count, total duration, max duration]
+            self.durations = {}
+
+    def _record(self, operation, duration, hits=0, misses=0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            stats = self.durations.setdefault(operation, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+
+    def _call(self, operation, *args, **kwargs):
+        start = perf_counter()
+        rv = getattr(self.backend, operation)(*args, **kwargs)
+        self._record(operation, perf_counter() - start)
+        return rv
+
+    def get(self, key):
+        start = perf_counter()
+        rv = self.backend.get(key)
+        self._record('get', perf_counter() - start, hits=int(rv is not None), misses=int(rv is None))
+        return rv
+
+    def get_many(self, *keys):
+        start = perf_counter()
+        rv = self.backend.get_many(*keys)
+        hits = sum(1 for v in rv if v is not None)
+        self._record('get_many', perf_counter() - start, hits=hits, misses=len(rv) - hits)
+        return rv
+
+    def set(self, key, value, timeout=None):
+        return self._call('set', key, value, timeout)
+
+    def set_many(self, mapping, timeout=None):
+        return self._call('set_many', mapping, timeout)
+
+    def delete(self, key):
+        return self._call('delete', key)
+
+    def delete_many(self, *keys):
+        return self._call('delete_many', *keys)
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': type(self.backend).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else None,
+                # operation -> (count, mean duration in ms, max duration in ms)
+                'operations': {op: (count, total / count * 1000, max_duration * 1000)
+                               for op, (count, total, max_duration) in sorted(self.durations.items())},
+            }
+
+    def get_keys(self):
+        """Returns list of keys in cache or None if backend can't list its keys (e.g. filesystem)."""
+        if hasattr(self.backend, 'keys'):
+            return self.backend.keys()
+        if isinstance(getattr(self.backend, '_cache', None), dict):
+            # simple
+            return list(self.backend._cache.keys())
+        if hasattr(self.backend, '_write_client'):
+            # redis
+            prefix = self.backend.key_prefix or ''
+            return sorted(k.decode()[len(prefix):] for k in self.backend._write_client.scan_iter(prefix + '*'))
+        return None
@@ -1,7 +1,12 @@
 import click
+from datetime import date
 from . import app
 from .models import User
-from .mybinder_archives import parse_mybinder_archives as _parse_mybinder_archives
+from .mybinder_archives import parse_mybinder_archives as _parse_mybinder_archives, ARCHIVE_URL
+from .utilities_db import rebuild_launch_counts as _rebuild_launch_counts
+from .parquet_export import export_launches as _export_launches
+from .query_plans import check_launch_queries
+from .launch_spool import flush_spool, is_enabled as is_spool_enabled
 
 
 # http://flask.pocoo.org/docs/1.0/cli/#custom-commands
@@ -22,7 +27,64 @@ def create_user(name, password, email="", active=True):
 @click.option('--all-events', '-a', is_flag=True, help="Parse all events.")
 @click.option('--with-description', '-d', is_flag=True, help="Fetch description of repos.")
 @click.option('--excluded-origins', '-e', help="List of origins to exclude (comma-separated).")
-def parse_mybinder_archives(binder='mybinder', all_events=False, with_description=False, excluded_origins=None):
+@click.option('--bulk', '-b', is_flag=True, help="Save launches with vectorized bulk loader.")
+@click.option('--source', '-s', default=ARCHIVE_URL,
+              help="Url of archives or path of a local directory with archives (index.jsonl and events-*.jsonl).")
+@click.option('--stream', is_flag=True, help="Read archives line by line and save launches in batches.")
+@click.option('--batch-size', default=10000, help="Number of launches saved at once in stream mode.")
+@click.option('--workers', '-w', default=1,
+              help="Number of archives downloaded and parsed concurrently. "
+                   "With more than 1 worker, launches are saved with bulk loader.")
+def parse_mybinder_archives(binder='mybinder', all_events=False, with_description=False, excluded_origins=None,
+                            bulk=False, source=ARCHIVE_URL, stream=False, batch_size=10000, workers=1):
     if excluded_origins is not None:
         excluded_origins = excluded_origins.split(',')
-    _parse_mybinder_archives(binder, all_events, with_description, excluded_origins)
+    _parse_mybinder_archives(binder, all_events, with_description, excluded_origins, bulk,
+                             source, stream, batch_size, workers)
+
+
+# flask export-launches-parquet /data/launches
+@app.cli.command()
+@click.argument('output_dir', required=False)
+@click.option('--from-date', '-f', help="Export days since this date (YYYY-MM-DD). "
+                                        "Default is the last exported day.")
+def export_launches_parquet(output_dir=None, from_date=None):
+    """Exports launches into parquet files per day, partitioned by year."""
+    if from_date is not None:
+        from_date = date.fromisoformat(from_date)
+    count = _export_launches(output_dir, from_date)
+    print(f"{count} launches are exported!")
+
+
+# flask rebuild-launch-counts
+@app.cli.command()
+def rebuild_launch_counts():
+    """Re-creates hourly and daily launch count rollups and launch counters of repos from launches."""
+    _rebuild_launch_counts()
+    print("Launch counts are rebuilt!")
+
+
+# flask explain-launch-queries
+@app.cli.command()
+@click.option('--verbose', '-v', is_flag=True, help="Print query plans of all queries.")
+def explain_launch_queries(verbose=False):
+    """Checks with EXPLAIN that hot queries of launches use indexes without sorting or scanning all rows,
+    exits with 1 if any of them doesn't."""
+    failed = 0
+    for name, plan, passed in check_launch_queries():
+        print(f"{'OK' if passed else 'FAILED'}: {name}")
+        if verbose or not passed:
+            print("\n".join(f"    {line}" for line in plan))
+        failed += not passed
+    if failed:
+        raise click.ClickException(f"{failed} queries don't use indexes as expected")
+
+
+# flask flush-launch-spool
+@app.cli.command()
+def flush_launch_spool():
+    """Saves launches in the launch spool into database, e.g. after a crash."""
+    if not is_spool_enabled():
+        raise click.ClickException("LAUNCH_SPOOL_PATH is not set")
+    count = flush_spool()
+    print(f"{count} launches are saved!")
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from threading import Lock
+from . import app, db
+from .models import Repo
+from .tasks import submit
+
+_lock = Lock()
+# provider namespaces which are queued or refreshed recently by this process
+_pending = set()
+_refreshed = {}
+
+
+def _is_fresh(refreshed_at, now=None):
+    ttl = timedelta(seconds=app.config['DESCRIPTION_REFRESH_TTL'])
+    return refreshed_at is not None and (now or datetime.utcnow()) - refreshed_at < ttl
+
+
+def refresh_description(provider_namespace, force=False):
+    """Scrapes and saves the description of a repo, if it is not refreshed in DESCRIPTION_REFRESH_TTL."""
+    try:
+        repo = Repo.query.filter_by(provider_namespace=provider_namespace).first()
+        if repo is None or (force is False and _is_fresh(repo.description_updated_at)):
+            # another process has already refreshed it
+            return
+        repo.description = repo.get_repo_description()
+        repo.description_updated_at = datetime.utcnow()
+        db.session.commit()
+    finally:
+        with _lock:
+            _pending.discard(provider_namespace)
+            _refreshed[provider_namespace] = datetime.utcnow()
+
+
+def enqueue_description_refresh(provider_namespaces):
+    """Queues description refresh of given repos in background.
+    A repo is scraped at most once in DESCRIPTION_REFRESH_TTL seconds.
+    Only GitHub repos have descriptions, others are skipped.
+    """
+    now = datetime.utcnow()
+    with _lock:
+        if len(_refreshed) > 100000:
+            for pn, refreshed_at in list(_refreshed.items()):
+                if not _is_fresh(refreshed_at, now):
+                    del _refreshed[pn]
+        queue = []
+        for provider_namespace in provider_namespaces:
+            if not provider_namespace.startswith('gh/') or provider_namespace in _pending or \
+               _is_fresh(_refreshed.get(provider_namespace), now):
+                continue
+            _pending.add(provider_namespace)
+            queue.append(provider_namespace)
+    for provider_namespace in queue:
+        submit(refresh_description, provider_namespace)
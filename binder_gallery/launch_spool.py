@@ -0,0 +1,206 @@
+import os
+import json
+import fcntl
+import sqlite3
+from datetime import datetime
+from threading import Event, Lock, Thread, local
+from uuid import uuid4
+from . import app, db
+from .models import BinderLaunch, LaunchSpoolCheckpoint
+from .utilities_db import add_launches, validate_launch_spec
+from .descriptions import enqueue_description_refresh
+
+# write-behind mode of launch POSTs: validated launches are appended to a local sqlite spool (WAL mode)
+# and saved into database in batches by a flusher thread, so requests don't wait for database commits.
+# id of the last saved spool row is committed with launches, so after a crash only unsaved rows are replayed.
+SPOOL_COLUMNS = ['schema', 'version', 'timestamp', 'origin', 'provider', 'spec', 'status']
+
+_local = local()
+_flusher = None
+_flusher_lock = Lock()
+# set when enough launches are appended to flush them before the interval is over
+_flush_event = Event()
+_appended = 0
+
+
+def is_enabled():
+    return bool(app.config.get('LAUNCH_SPOOL_PATH'))
+
+
+def get_connection():
+    """Returns connection of this thread to the spool, spool is created if it doesn't exist."""
+    path = app.config['LAUNCH_SPOOL_PATH']
+    connection = getattr(_local, 'connection', None)
+    if connection is None or _local.path != path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # AUTOINCREMENT: ids of deleted rows are never reused, checkpoints depend on it
+        connection.execute("CREATE TABLE IF NOT EXISTS launch "
+                           "(id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL)")
+        connection.execute("CREATE TABLE IF NOT EXISTS spool (spool_id TEXT NOT NULL)")
+        # launches which couldn't be saved, they are kept with their spool id and error for inspection
+        connection.execute("CREATE TABLE IF NOT EXISTS quarantine "
+                           "(id INTEGER PRIMARY KEY, data TEXT NOT NULL, error TEXT NOT NULL)")
+        # id of the spool is the key of its checkpoint in database, a new spool file gets a new id
+        connection.execute("INSERT INTO spool (spool_id) SELECT ? WHERE NOT EXISTS (SELECT 1 FROM spool)",
+                           (uuid4().hex, ))
+        _local.connection, _local.path = connection, path
+    return connection
+
+
+def get_spool_id():
+    return get_connection().execute("SELECT spool_id FROM spool").fetchone()[0]
+
+
+def spool_launches(launches):
+    """Appends launches (BinderLaunch objects, not added to db session) to the spool in one transaction.
+    They are saved into database later by the flusher."""
+    global _appended
+    rows = []
+    for launch in launches:
+        data = {column: getattr(launch, column) for column in SPOOL_COLUMNS}
+        data['timestamp'] = launch.timestamp.isoformat()
+        rows.append((json.dumps(data), ))
+    with get_connection() as connection:
+        connection.execute("BEGIN")
+        connection.executemany("INSERT INTO launch (data) VALUES (?)", rows)
+
+    if app.config['BACKGROUND_WORKERS'] == 0:
+        # e.g. for tests
+        flush_spool()
+        return
+    start_flusher()
+    with _flusher_lock:
+        _appended += len(rows)
+        if _appended >= app.config['LAUNCH_SPOOL_FLUSH_SIZE']:
+            _appended = 0
+            _flush_event.set()
+
+
+def get_spool_size():
+    """Returns number of launches in the spool which are not saved into database yet."""
+    return get_connection().execute("SELECT count(id) FROM launch").fetchone()[0]
+
+
+def get_quarantine_size():
+    """Returns number of spooled launches which couldn't be saved."""
+    return get_connection().execute("SELECT count(id) FROM quarantine").fetchone()[0]
+
+
+def _load_launch(data):
+    data = json.loads(data)
+    data['timestamp'] = datetime.fromisoformat(data['timestamp'])
+    launch = BinderLaunch(**data)
+    validate_launch_spec(launch)
+    return launch
+
+
+def _flush_batch(spool_id, batch_size):
+    """Saves a batch of spooled launches into database and removes them from the spool.
+    Launches which can't be saved are moved into quarantine, so that they don't block the spool.
+
+    :return: number of processed (saved or quarantined) and number of saved launches
+    """
+    connection = get_connection()
+    if connection.execute("SELECT 1 FROM launch LIMIT 1").fetchone() is None:
+        # nothing to flush, don't open a database transaction
+        return 0, 0
+    checkpoint = LaunchSpoolCheckpoint.query.filter_by(spool_id=spool_id).with_for_update().first()
+    if checkpoint is None:
+        checkpoint = LaunchSpoolCheckpoint(spool_id=spool_id, last_id=0)
+        db.session.add(checkpoint)
+    # rows until the checkpoint are already saved, but the flusher crashed before removing them
+    connection.execute("DELETE FROM launch WHERE id <= ?", (checkpoint.last_id, ))
+    rows = connection.execute("SELECT id, data FROM launch ORDER BY id LIMIT ?", (batch_size, )).fetchall()
+    if not rows:
+        db.session.rollback()
+        return 0, 0
+
+    launches = []
+    quarantined = []
+    for row_id, data in rows:
+        try:
+            launches.append(_load_launch(data))
+        except Exception as e:
+            quarantined.append((row_id, data, f"{type(e).__name__}: {e}"))
+    if quarantined:
+        # before commit, so that replayed rows are quarantined again
+        with connection:
+            connection.execute("BEGIN")
+            connection.executemany("INSERT OR REPLACE INTO quarantine (id, data, error) VALUES (?, ?, ?)",
+                                   quarantined)
+        app.logger.warning(f"Launch spool: {len(quarantined)} launches are moved into quarantine, "
+                           f"e.g. {quarantined[0][2]}")
+    repos = {}
+    if launches:
+        launches.sort(key=lambda l: l.timestamp)
+        repos = add_launches(launches)
+    # checkpoint is moved past quarantined rows too
+    checkpoint.last_id = rows[-1][0]
+    checkpoint.updated_at = datetime.utcnow()
+    # group commit
+    db.session.commit()
+    connection.execute("DELETE FROM launch WHERE id <= ?", (checkpoint.last_id, ))
+    enqueue_description_refresh(repos)
+    return len(rows), len(launches)
+
+
+def flush_spool():
+    """Saves all spooled launches into database in batches of LAUNCH_SPOOL_FLUSH_SIZE.
+    It is also used to replay the spool after a crash.
+    Only one process can flush a spool at a time, other processes return immediately.
+
+    :return: number of saved launches
+    """
+    lock_file = open(app.config['LAUNCH_SPOOL_PATH'] + '.lock', 'w')
+    try:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # another process is flushing
+            return 0
+        spool_id = get_spool_id()
+        batch_size = app.config['LAUNCH_SPOOL_FLUSH_SIZE']
+        total_count = 0
+        while True:
+            processed, count = _flush_batch(spool_id, batch_size)
+            total_count += count
+            if processed < batch_size:
+                break
+        if total_count:
+            app.logger.info(f"Launch spool: {total_count} launches are saved")
+        return total_count
+    finally:
+        lock_file.close()
+
+
+def _run_flusher():
+    while True:
+        # wait until interval is over or enough launches are appended
+        _flush_event.wait(app.config['LAUNCH_SPOOL_FLUSH_INTERVAL'])
+        _flush_event.clear()
+        with app.app_context():
+            try:
+                flush_spool()
+            except Exception as e:
+                app.logger.error(f"Error: flushing launch spool failed: {e}")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+
+def start_flusher():
+    """Starts the flusher thread of this process, if it is not started yet.
+    Flusher replays launches which are left in the spool, e.g. after a crash."""
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = Thread(target=_run_flusher, name='launch_spool_flusher', daemon=True)
+            _flusher.start()
+
+
+@app.before_first_request
+def _start_flusher_on_first_request():
+    if is_enabled() and app.config['BACKGROUND_WORKERS'] != 0:
+        start_flusher()
@@ -6,6 +6,7 @@ from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import cached_property
 from urllib.parse import unquote
+from sqlalchemy.ext.declarative import declared_attr
 
 from binder_gallery import db, app
 
@@ -21,6 +22,8 @@ PROVIDER_PREFIXES = {
     'Hydroshare': 'hydroshare',
     'Dataverse': 'dataverse',
 }
+# providers without ref info
+DATA_PROVIDER_PREFIXES = ['zenodo', 'figshare', 'hydroshare', 'dataverse']
 
 
 def _strip(type_, text, affixes):
@@ -243,7 +246,10 @@ class RepoMixin(object):
 
     @property
     def binder_url(self):
-        return f'{app.default_binder_url}/v2/{self.provider_spec}'
+        provider_spec = self.provider_spec
+        if provider_spec is None:
+            return None
+        return f'{app.default_binder_url}/v2/{provider_spec}'
 
     # @property
     # def binder_ref_url(self):
@@ -252,7 +258,7 @@ class RepoMixin(object):
 
     def get_repo_description(self):
         repo_url = self.repo_url
-        if 'github.com' not in repo_url or 'gist.github.com' in repo_url:
+        if not repo_url or 'github.com' not in repo_url or 'gist.github.com' in repo_url:
             # only for GitHub repos
             return ''
         try:
@@ -270,6 +276,42 @@ class RepoMixin(object):
         return ''
 
 
+class RepoSpec(RepoMixin):
+    """Parses spec of a repo without loading it from database."""
+
+    def __init__(self, provider_prefix, spec):
+        self.provider_prefix = provider_prefix
+        self.spec = spec
+
+
+def get_namespace_fields(provider_namespace):
+    """Parses provider_namespace of a repo into the columns which are stored in repo table.
+
+    :return: dict of provider, org, repo_name and repo_url
+    """
+    for provider_name, prefix in PROVIDER_PREFIXES.items():
+        if provider_namespace.startswith(prefix+'/'):
+            break
+    else:
+        raise ValueError(f'{provider_namespace} is not valid.')
+    spec = provider_namespace[len(prefix+'/'):]
+    if prefix not in DATA_PROVIDER_PREFIXES:
+        # namespace has no ref, add a placeholder to parse it as a spec
+        spec += '/master'
+    repo_spec = RepoSpec(prefix, spec)
+    org, repo_name = repo_spec.repo_namespace
+    return {'provider': provider_name, 'org': org, 'repo_name': repo_name, 'repo_url': repo_spec.repo_url}
+
+
+def get_namespace_fields_or_null(provider_namespace):
+    """Same as `get_namespace_fields`, but all fields are None if provider_namespace can't be parsed,
+    such repos are stored with empty columns, same as in migration 7a682a594e53."""
+    try:
+        return get_namespace_fields(provider_namespace)
+    except ValueError:
+        return dict.fromkeys(['provider', 'org', 'repo_name', 'repo_url'])
+
+
 class Repo(RepoMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     # http://flask-sqlalchemy.pocoo.org/2.3/models/#one-to-many-relationships
@@ -278,37 +320,61 @@ class Repo(RepoMixin, db.Model):
                                lazy='dynamic')
     provider_namespace = db.Column(db.String, unique=True, index=True)  # provider_prefix/namespace
     description = db.Column(db.Text)
+    description_updated_at = db.Column(db.DateTime, nullable=True)  # last time description is scraped
     last_ref = db.Column(db.String, default="master", server_default="master")  # last launched ref
+    # parsed from provider_namespace, see `get_namespace_fields`
+    provider = db.Column(db.String, index=True)  # provider_name
+    org = db.Column(db.String, index=True)
+    repo_name = db.Column(db.String, index=True)
+    repo_url = db.Column(db.String)
+    # launch counters, maintained by `utilities_db.add_repo_counters` whenever launches are saved
+    launch_count = db.Column(db.Integer, nullable=False, default=0, server_default="0", index=True)
+    first_launch = db.Column(db.DateTime, nullable=True)  # timestamp of first launch
+    last_launch = db.Column(db.DateTime, nullable=True)  # timestamp of last launch
+    # log2 of sum of launches, each one is weighted with 2^((timestamp - epoch) / TRENDING_HALF_LIFE),
+    # so it is comparable between repos without decaying scores over time. see `utilities_db.add_trending_score`
+    trending_score = db.Column(db.Float, nullable=True, index=True)
 
     def __repr__(self):
         return f'{self.id}: {self.provider_namespace}'
 
-    @cached_property
+    @db.validates('provider_namespace')
+    def validate_provider_namespace(self, key, provider_namespace):
+        for column, value in get_namespace_fields_or_null(provider_namespace).items():
+            setattr(self, column, value)
+        return provider_namespace
+
+    @property
     def provider_prefix(self):
-        for prefix in PROVIDER_PREFIXES.values():
-            if self.provider_namespace.startswith(prefix+'/'):
-                return prefix
-        raise ValueError(f'{self.provider_namespace} is not valid.')
+        if self.provider is None:
+            # provider_namespace couldn't be parsed
+            return None
+        return PROVIDER_PREFIXES[self.provider]
 
-    @cached_property
-    def provider(self):
-        for provider_name, prefix in PROVIDER_PREFIXES.items():
-            if self.provider_namespace.startswith(prefix+'/'):
-                return provider_name
-        raise ValueError(f'{self.provider_namespace} is not valid.')
+    @property
+    def repo_namespace(self):
+        return self.org, self.repo_name
+
+    @staticmethod
+    def get_provider_spec(provider, provider_namespace, last_ref):
+        if provider is None:
+            # provider_namespace couldn't be parsed
+            return None
+        if PROVIDER_PREFIXES[provider] in DATA_PROVIDER_PREFIXES:
+            # zenodo and figshare have no ref info
+            return provider_namespace
+        return provider_namespace + "/" + last_ref
 
     @property
     def provider_spec(self):
-        if self.provider_prefix in ['zenodo', 'figshare', 'hydroshare', 'dataverse']:
-            # zenodo and figshare have no ref info
-            provider_spec = self.provider_namespace
-        else:
-            provider_spec = self.provider_namespace + "/" + self.last_ref
-        return provider_spec
+        return self.get_provider_spec(self.provider, self.provider_namespace, self.last_ref)
 
     @property
     def spec(self):
-        return self.provider_spec[len(self.provider_prefix+'/'):]
+        provider_spec = self.provider_spec
+        if provider_spec is None:
+            return None
+        return provider_spec[len(self.provider_prefix+'/'):]
 
     # def get_binder_url(self, spec):
     #     return f'{app.default_binder_url}/v2/{self.provider_prefix}/{spec}'
@@ -316,14 +382,20 @@ class Repo(RepoMixin, db.Model):
 
 @architect.install('partition', type='range', subtype='date', constraint='year', column='timestamp', orm='sqlalchemy', db=app.config['SQLALCHEMY_DATABASE_URI'])
 class BinderLaunch(RepoMixin, db.Model):
+    # launches are mostly queried by origins and time range and then grouped by repo,
+    # or by time range (of all or of a repo) in order of (timestamp, id). see `query_plans.py`
+    # NOTE indexes for previous partitions are not created automatically
+    __table_args__ = (db.Index('ix_binder_launch_origin_timestamp_repo_id', 'origin', 'timestamp', 'repo_id'),
+                      db.Index('ix_binder_launch_timestamp_id', 'timestamp', 'id'),
+                      db.Index('ix_binder_launch_repo_id_timestamp_id', 'repo_id', 'timestamp', 'id'))
     id = db.Column(db.Integer, primary_key=True)
     schema = db.Column(db.String, nullable=False)
     version = db.Column(db.String, nullable=False)
-    timestamp = db.Column(db.DateTime, nullable=False, index=True)
-    origin = db.Column(db.String, nullable=True, index=True, default="", server_default="")
+    timestamp = db.Column(db.DateTime, nullable=False)
+    origin = db.Column(db.String, nullable=True, default="", server_default="")
     provider = db.Column(db.String, nullable=False)  # provider_name
     spec = db.Column(db.String, nullable=False)
-    repo_id = db.Column(db.Integer, db.ForeignKey('repo.id'), nullable=True, index=True)
+    repo_id = db.Column(db.Integer, db.ForeignKey('repo.id'), nullable=True)
     status = db.Column(db.String, nullable=False)
 
     def __repr__(self):
@@ -341,6 +413,12 @@ class BinderLaunch(RepoMixin, db.Model):
     def repo_description(self):
         return self.detail.description if self.detail else ''
 
+    @property
+    def ref(self):
+        if self.provider_prefix in DATA_PROVIDER_PREFIXES:
+            return ""
+        return self.spec.split('/')[-1]
+
     @property
     def provider_namespace(self):
         if self.provider_prefix in ["zenodo", "figshare", "hydroshare", "dataverse"]:
@@ -359,3 +437,96 @@ class BinderLaunch(RepoMixin, db.Model):
                                         "/".join(provider_spec_parts),
                                         ['.git'])
         return provider_namespace
+
+
+class LaunchCountMixin(object):
+    """Pre-aggregated launch counts of a repo per origin and time bucket.
+    Rows are maintained by `utilities_db.update_launch_counts` whenever launches are saved.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    origin = db.Column(db.String, nullable=False, default="", server_default="")
+    # start of the bucket (UTC)
+    bucket = db.Column(db.DateTime, nullable=False, index=True)
+    launch_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    @declared_attr
+    def repo_id(cls):
+        return db.Column(db.Integer, db.ForeignKey('repo.id'), nullable=False)
+
+    def __repr__(self):
+        return f'{self.repo_id}: {self.origin} {self.bucket} {self.launch_count}'
+
+
+class HourlyLaunchCount(LaunchCountMixin, db.Model):
+    __tablename__ = 'launch_count_hourly'
+    __table_args__ = (db.UniqueConstraint('repo_id', 'origin', 'bucket'),)
+
+    @staticmethod
+    def get_bucket(timestamp):
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+class DailyLaunchCount(LaunchCountMixin, db.Model):
+    __tablename__ = 'launch_count_daily'
+    __table_args__ = (db.UniqueConstraint('repo_id', 'origin', 'bucket'),)
+
+    @staticmethod
+    def get_bucket(timestamp):
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class OriginLaunchCount(db.Model):
+    """Total launch count of a repo per origin.
+    Rows are maintained by `utilities_db.add_repo_counters` whenever launches are saved.
+    """
+    __tablename__ = 'launch_count_origin'
+    __table_args__ = (db.UniqueConstraint('repo_id', 'origin'),)
+    id = db.Column(db.Integer, primary_key=True)
+    repo_id = db.Column(db.Integer, db.ForeignKey('repo.id'), nullable=False)
+    origin = db.Column(db.String, nullable=False, default="", server_default="")
+    launch_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        return f'{self.repo_id}: {self.origin} {self.launch_count}'
+
+
+class TotalLaunchCount(db.Model):
+    """Total launch count per origin, including launches without a repo.
+    Rows are maintained by `utilities_db.add_origin_counts` whenever launches are saved.
+    """
+    __tablename__ = 'launch_count_total'
+    id = db.Column(db.Integer, primary_key=True)
+    origin = db.Column(db.String, nullable=False, unique=True, default="", server_default="")
+    launch_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        return f'{self.origin}: {self.launch_count}'
+
+
+class ArchiveCheckpoint(db.Model):
+    """Progress of parsing a mybinder.org archive for a binder."""
+    __tablename__ = 'archive_checkpoint'
+    __table_args__ = (db.UniqueConstraint('binder', 'archive_name'),)
+    id = db.Column(db.Integer, primary_key=True)
+    binder = db.Column(db.String, nullable=False)
+    archive_name = db.Column(db.String, nullable=False)  # e.g. events-2019-06-12.jsonl
+    line_offset = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # number of parsed lines
+    last_timestamp = db.Column(db.DateTime, nullable=True)  # timestamp of last saved launch
+    row_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # number of saved launches
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'{self.binder}: {self.archive_name} {self.line_offset}'
+
+
+class LaunchSpoolCheckpoint(db.Model):
+    """Last launch of a launch spool which is saved into database, see `launch_spool.py`.
+    It is updated in the same transaction as launches are saved."""
+    __tablename__ = 'launch_spool_checkpoint'
+    id = db.Column(db.Integer, primary_key=True)
+    spool_id = db.Column(db.String, nullable=False, unique=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # id of last saved spool row
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'{self.spool_id}: {self.last_id}'
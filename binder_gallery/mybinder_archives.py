@@ -1,14 +1,44 @@
+import os
+import json
+import requests
 import pandas as pd
 
-from time import sleep
+from time import perf_counter
+from itertools import islice
+from collections import Counter, deque
+from tempfile import TemporaryDirectory
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime, timedelta, date
-from sqlalchemy import func
+from sqlalchemy import bindparam
+from sqlalchemy.dialects import postgresql
 
-from .models import app, db, Repo, BinderLaunch
+from .models import app, db, BinderLaunch, Repo, ArchiveCheckpoint, PROVIDER_PREFIXES, DATA_PROVIDER_PREFIXES, \
+    get_namespace_fields_or_null
+from .utilities_db import add_launches, add_launch_counts, discount_launches, get_launch_timestamp_query, \
+    CHUNK_SIZE
+from .descriptions import enqueue_description_refresh
+from .page_cache import invalidate_pages
+
+ARCHIVE_URL = "https://archive.analytics.mybinder.org"
+# events before 12.06.2019 has no origin value
+ORIGIN_START_DATE = date(2019, 6, 12)
+# launches with wrong provider in archives, archive name -> {spec: (provider, fixed spec)}
+WRONG_LAUNCHES = {
+    "events-2018-11-25.jsonl": {
+        "https%3A%2F%2Fgist.github.com%2Fjakevdp/256c3ad937af9ec7d4c65a29e5b6d454":
+            ("Gist", "jakevdp/256c3ad937af9ec7d4c65a29e5b6d454"),
+    },
+    "events-2019-01-28.jsonl": {
+        "loicmarie/ade5ea460444ea0ff72d5c94daa14500": ("Gist", "loicmarie/ade5ea460444ea0ff72d5c94daa14500"),
+    },
+    "events-2019-02-22.jsonl": {
+        "minrk/6d61e5edfa4d2947b0ee8c1be8e79154": ("Gist", "minrk/6d61e5edfa4d2947b0ee8c1be8e79154"),
+    },
+}
 
 
 def save_launches(new_launches, with_description):
-    provider_namespaces = {}
+    launches = []
     for i, data in new_launches.sort_index(ascending=True).iterrows():
         origin = data.get('origin', 'mybinder.org')
         timestamp = data['timestamp'].replace(tzinfo=None)
@@ -21,39 +51,459 @@ def save_launches(new_launches, with_description):
                               provider=data['provider'],
                               spec=data['spec'],
                               status=data['status'])
+        launches.append(launch)
+    repos = add_launches(launches)
+    db.session.commit()
+    if with_description:
+        enqueue_description_refresh(repos)
 
-        # binder_launches.append(launch)
-        provider_namespace = launch.provider_namespace
-        if provider_namespace in provider_namespaces:
-            provider_namespaces[provider_namespace].append(launch)
-        else:
-            provider_namespaces[provider_namespace] = [launch]
 
-    for provider_namespace, launches in provider_namespaces.items():
-        repo = Repo.query.filter_by(provider_namespace=provider_namespace).first()
-        description = launches[0].get_repo_description() if with_description else ""
-        if launches[-1].provider_prefix in ["zenodo", "figshare", "hydroshare", "dataverse"]:
-            last_ref = ""
-        else:
-            last_ref = launches[-1].spec.split('/')[-1]
+def get_launch_columns(new_launches):
+    """Computes columns of launches with vectorized string operations,
+    equivalent to `BinderLaunch.provider_namespace` and `BinderLaunch.ref`.
+
+    :param new_launches: launches frame of an archive
+    :return: new frame with additional provider_namespace and last_ref columns
+    """
+    frame = new_launches.copy()
+    if 'origin' not in frame:
+        frame['origin'] = 'mybinder.org'
+    prefix = frame['provider'].map(PROVIDER_PREFIXES)
+    provider_spec = prefix + '/' + frame['spec']
+    provider_spec_parts = provider_spec.str.split('/')
+    is_data = prefix.isin(DATA_PROVIDER_PREFIXES)
+    # gh and gl branches can contain "/", git and gist have ref only as commit SHA
+    provider_namespace = provider_spec_parts.str[:-1].str.join('/').\
+        where(~prefix.isin(['gh', 'gl']), provider_spec_parts.str[:3].str.join('/'))
+    provider_namespace = provider_namespace.str.replace(r'\.git$', '', regex=True)
+    # zenodo and figshare have no ref info
+    frame['provider_namespace'] = provider_namespace.where(~is_data, provider_spec)
+    frame['last_ref'] = frame['spec'].str.split('/').str[-1].where(~is_data, '')
+    timestamp = frame['timestamp']
+    if timestamp.dt.tz is not None:
+        timestamp = timestamp.dt.tz_convert(None)
+    frame['timestamp'] = timestamp
+    frame['version'] = frame['version'].astype(str)
+    return frame
+
 
-        if repo:
-            repo.launches.extend(launches)
-            if with_description:
-                repo.description = description
-            repo.last_ref = last_ref
+def upsert_repos(frame):
+    """Creates missing repos and updates last refs of existing ones with bulk statements.
+
+    :param frame: launches frame with provider_namespace and last_ref columns sorted by timestamp
+    :return: dict of provider_namespace -> repo id
+    """
+    last_refs = frame.groupby('provider_namespace', sort=False)['last_ref'].last().to_dict()
+    provider_namespaces = list(last_refs)
+
+    def get_repo_ids():
+        repo_ids = {}
+        for i in range(0, len(provider_namespaces), CHUNK_SIZE):
+            repo_ids.update(Repo.query.
+                            with_entities(Repo.provider_namespace, Repo.id).
+                            filter(Repo.provider_namespace.in_(provider_namespaces[i:i+CHUNK_SIZE])).
+                            all())
+        return repo_ids
+
+    repo_ids = get_repo_ids()
+    new_repos = [dict(get_namespace_fields_or_null(pn), provider_namespace=pn, description="", last_ref=last_refs[pn])
+                 for pn in provider_namespaces if pn not in repo_ids]
+    if new_repos:
+        if db.engine.dialect.name == 'postgresql':
+            # repos could be created by launch api in the meantime
+            statement = postgresql.insert(Repo.__table__).on_conflict_do_nothing(index_elements=['provider_namespace'])
         else:
-            repo = Repo(provider_namespace=provider_namespace, description=description,
-                        launches=launches, last_ref=last_ref)
-            db.session.add(repo)
-        for launch in launches:
-            db.session.add(launch)
+            statement = Repo.__table__.insert()
+        db.session.execute(statement, new_repos)
+        repo_ids = get_repo_ids()
+    new_provider_namespaces = {r['provider_namespace'] for r in new_repos}
+    old_repos = [{'b_id': repo_ids[pn], 'b_last_ref': last_refs[pn]}
+                 for pn in provider_namespaces if pn not in new_provider_namespaces]
+    if old_repos:
+        table = Repo.__table__
+        db.session.execute(table.update().
+                           where(table.c.id == bindparam('b_id')).
+                           values(last_ref=bindparam('b_last_ref')),
+                           old_repos)
+    return repo_ids
+
+
+def save_launches_bulk(new_launches, with_description, chunk_size=10000):
+    """Bulk version of `save_launches`: columns are computed with vectorized operations,
+    repos are upserted with bulk statements and launches are inserted with executemany in chunks.
+    """
+    frame = get_launch_columns(new_launches.sort_index(ascending=True))
+    unknown_providers = frame['provider_namespace'].isnull()
+    if unknown_providers.any():
+        app.logger.warning(f"save_launches_bulk: {unknown_providers.sum()} launches with unknown provider "
+                           f"are skipped: {list(frame.loc[unknown_providers, 'provider'].unique())}")
+        frame = frame.loc[~unknown_providers]
+    if len(frame) == 0:
+        return
+
+    repo_ids = upsert_repos(frame)
+    frame['repo_id'] = frame['provider_namespace'].map(repo_ids)
+
+    columns = ['schema', 'version', 'timestamp', 'origin', 'provider', 'spec', 'status', 'repo_id']
+    values = {c: frame[c].tolist() for c in columns}
+    # convert pandas timestamps and numpy integers into python types
+    values['timestamp'] = list(frame['timestamp'].dt.to_pydatetime())
+    values['repo_id'] = [int(repo_id) for repo_id in values['repo_id']]
+    records = [dict(zip(columns, row)) for row in zip(*[values[c] for c in columns])]
+    table = BinderLaunch.__table__
+    for i in range(0, len(records), chunk_size):
+        db.session.execute(table.insert(), records[i:i+chunk_size])
+
+    add_launch_counts(Counter(zip(values['repo_id'], values['origin'], values['timestamp'])))
+    db.session.commit()
+    if with_description:
+        enqueue_description_refresh(list(repo_ids))
+
+
+def get_archive_path(source, name):
+    if source.startswith(('http://', 'https://')):
+        return f"{source.rstrip('/')}/{name}"
+    return os.path.join(source, name)
+
+
+def iter_lines(source, name):
+    """Yields non-empty lines of an archive without loading the whole archive into memory.
+
+    :param source: url of archives or path of a local directory (e.g. mirror of archives)
+    :param name: file name of the archive, e.g. events-2019-06-12.jsonl
+    """
+    path = get_archive_path(source, name)
+    if source.startswith(('http://', 'https://')):
+        with requests.get(path, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            response.encoding = response.encoding or 'utf-8'
+            for line in response.iter_lines(decode_unicode=True):
+                if line.strip():
+                    yield line
+    else:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield line
+
+
+def get_archives(source, from_date):
+    """Reads index of archives and returns archives since from_date as a list of [name, date, count]."""
+    archives = []
+    for line in iter_lines(source, 'index.jsonl'):
+        d = json.loads(line)
+        a_date = date.fromisoformat(str(d['date'])[:10])
+        if a_date >= from_date:
+            archives.append([d['name'], a_date, d['count']])
+    return archives
+
+
+def fix_frame(_frame, a_name, a_date):
+    """Applies fix-ups of known errors in archives to launches frame of an archive (in place)."""
+    # events before 12.06.2019 has no origin value
+    if a_date < ORIGIN_START_DATE:
+        _frame['origin'] = 'mybinder.org'
+
+    # events-2019-06-12.jsonl has mixed rows: with and without origin value
+    if a_name == "events-2019-06-12.jsonl":
+        _frame['origin'] = _frame['origin'].fillna('mybinder.org')
+    # in some archives Gist launches have wrong provider (GitHub)
+    for spec, (provider, fixed_spec) in WRONG_LAUNCHES.get(a_name, {}).items():
+        wrong_launches = _frame['spec'] == spec
+        _frame.loc[wrong_launches, "provider"] = provider
+        _frame.loc[wrong_launches, "spec"] = fixed_spec
+
+
+def fix_event(event, a_name, a_date):
+    """Same as `fix_frame`, but for a single launch event (dict) of an archive (in place)."""
+    if a_date < ORIGIN_START_DATE or (a_name == "events-2019-06-12.jsonl" and event.get('origin') is None):
+        event['origin'] = 'mybinder.org'
+    wrong_launch = WRONG_LAUNCHES.get(a_name, {}).get(event['spec'])
+    if wrong_launch:
+        event['provider'], event['spec'] = wrong_launch
+
+
+def parse_timestamp(value):
+    """Returns timestamp of an archive event as naive datetime in UTC."""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(None)
+    return timestamp.to_pydatetime()
+
+
+def iter_events(lines, a_name, a_date, origins):
+    """Parses lines of an archive into launch events, applies fix-ups
+    and yields only events of given origins and date."""
+    for line in lines:
+        event = json.loads(line)
+        event['timestamp'] = parse_timestamp(event['timestamp'])
+        fix_event(event, a_name, a_date)
+        if event.get('origin') in origins and event['timestamp'].date() == a_date:
+            yield event
+
+
+def iter_batches(iterable, batch_size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class LineCounter(object):
+    """Iterates over lines and counts how many lines are consumed so far."""
+
+    def __init__(self, lines, count=0):
+        self.lines = lines
+        self.count = count
+
+    def __iter__(self):
+        for line in self.lines:
+            self.count += 1
+            yield line
+
+
+def get_saved_launches_query(origins, a_date):
+    day_start = datetime.combine(a_date, datetime.min.time())
+    return BinderLaunch.query.\
+        filter(BinderLaunch.origin.in_(origins),
+               BinderLaunch.timestamp >= day_start,
+               BinderLaunch.timestamp < day_start + timedelta(days=1))
+
+
+def get_checkpoint(binder, a_name):
+    checkpoint = ArchiveCheckpoint.query.filter_by(binder=binder, archive_name=a_name).first()
+    if checkpoint is None:
+        checkpoint = ArchiveCheckpoint(binder=binder, archive_name=a_name, line_offset=0, row_count=0)
+    return checkpoint
+
+
+def update_checkpoint(checkpoint, line_offset, new_launches_count, last_timestamp):
+    """Updates checkpoint in session. It is committed together with launches."""
+    checkpoint.line_offset = line_offset
+    checkpoint.row_count += new_launches_count
+    if last_timestamp is not None and (checkpoint.last_timestamp is None or
+                                       last_timestamp > checkpoint.last_timestamp):
+        checkpoint.last_timestamp = last_timestamp
+    checkpoint.updated_at = datetime.utcnow()
+    db.session.add(checkpoint)
+
+
+def init_legacy_checkpoint(checkpoint, origins, a_date, a_count_archive, line_offset, last_timestamp):
+    """Handles an archive which was (partially) saved before there were checkpoints.
+    If all launches of the archive are already saved, checkpoint is set to end of archive,
+    otherwise launches of the archive date are deleted to be re-saved from beginning.
+
+    :return: True if all launches are already saved
+    """
+    a_saved_query = get_saved_launches_query(origins, a_date)
+    a_count_saved = a_saved_query.count()
+    if a_count_saved == 0:
+        return False
+    if a_count_saved == a_count_archive:
+        app.logger.info(f"parse_mybinder_archives: everything is already saved ({a_count_saved} launches) "
+                        f"of {checkpoint.archive_name} - {a_date}")
+        update_checkpoint(checkpoint, line_offset, a_count_saved, last_timestamp)
+        db.session.commit()
+        return True
+    discount_launches(a_saved_query)
+    deleted = a_saved_query.delete(synchronize_session=False)
     db.session.commit()
+    app.logger.info(f"parse_mybinder_archives: deleted {deleted} launches of {checkpoint.archive_name} - {a_date} "
+                    f"without checkpoint, they will be re-saved")
+    return False
+
+
+def parse_archive(source, checkpoint, a_date, origins, with_description=False, bulk=False):
+    """Parses an archive with pandas and saves its launches after the checkpoint.
 
+    :return: number of saved launches
+    """
+    a_name = checkpoint.archive_name
+    _frame = pd.read_json(get_archive_path(source, a_name), lines=True)
+    line_offset = len(_frame)
+    if line_offset == 0:
+        app.logger.info(f"parse_mybinder_archives: {a_date} is empty")
+        return 0
+    if checkpoint.line_offset:
+        # rows of frame are in order of lines
+        _frame = _frame.iloc[checkpoint.line_offset:].copy()
 
-def parse_mybinder_archives(binder='mybinder', all_events=False, with_description=False, excluded_origins=None):
+    fix_frame(_frame, a_name, a_date)
+    # get launches of mybinder federation of this date
+    # some archives have launch data from previous day (eg events-2019-02-22.jsonl)
+    frame = _frame.loc[_frame['origin'].isin(origins) &
+                       (_frame['timestamp'] >= datetime.combine(a_date, datetime.min.time())) &
+                       (_frame['timestamp'] <= datetime.combine(a_date, datetime.max.time()))]
+    app.logger.info(f"parse_mybinder_archives: "
+                    f"{len(_frame)} - {len(frame)} = {len(_frame) - len(frame)} "
+                    f"launches are excluded from {a_name} after line {checkpoint.line_offset}.")
+    last_timestamp = frame['timestamp'].max().to_pydatetime().replace(tzinfo=None) if len(frame) else None
+
+    if checkpoint.id is None and \
+       init_legacy_checkpoint(checkpoint, origins, a_date, len(frame), line_offset, last_timestamp):
+        return 0
+
+    update_checkpoint(checkpoint, line_offset, len(frame), last_timestamp)
+    if len(frame) == 0:
+        db.session.commit()
+    elif bulk is True:
+        save_launches_bulk(frame, with_description)
+    else:
+        save_launches(frame, with_description)
+    return len(frame)
+
+
+def parse_archive_stream(source, checkpoint, a_date, origins, with_description=False, batch_size=10000):
+    """Streaming version of `parse_archive`: lines after the checkpoint are read one by one and
+    saved in batches, so memory usage doesn't depend on archive size.
+    Checkpoint is committed with each batch.
+
+    :return: number of saved launches
+    """
+    a_name = checkpoint.archive_name
+
+    def get_lines():
+        return LineCounter(islice(iter_lines(source, a_name), checkpoint.line_offset, None), checkpoint.line_offset)
+
+    # counting launches of an archive without checkpoint needs an extra pass (and download) of it,
+    # which is only needed if some launches of its date are already saved
+    if checkpoint.id is None and get_saved_launches_query(origins, a_date).count() > 0:
+        lines = get_lines()
+        a_count_archive, last_timestamp = 0, None
+        for event in iter_events(lines, a_name, a_date, origins):
+            a_count_archive += 1
+            last_timestamp = max(last_timestamp or event['timestamp'], event['timestamp'])
+        if init_legacy_checkpoint(checkpoint, origins, a_date, a_count_archive, lines.count, last_timestamp):
+            return 0
+
+    lines = get_lines()
+    count = 0
+    for batch in iter_batches(iter_events(lines, a_name, a_date, origins), batch_size):
+        # lines are read lazily, so lines.count is the line of last event in batch
+        update_checkpoint(checkpoint, lines.count, len(batch), max(event['timestamp'] for event in batch))
+        save_launches_bulk(pd.DataFrame(batch), with_description)
+        count += len(batch)
+    # remaining lines without launches of origins
+    update_checkpoint(checkpoint, lines.count, 0, None)
+    db.session.commit()
+    return count
+
+
+def download_archive(source, a_name, tmp_dir):
+    """Downloads an archive into tmp_dir. Local archives are not copied.
+
+    :return: path of the archive
+    """
+    if not source.startswith(('http://', 'https://')):
+        return get_archive_path(source, a_name)
+    path = os.path.join(tmp_dir, a_name)
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in iter_lines(source, a_name):
+            f.write(line + '\n')
+    return path
+
+
+def parse_archive_file(path, a_name, a_date, origins, line_offset):
+    """Parses launch events of a local archive after line_offset. It runs in a worker process.
+
+    :return: events, number of lines in archive and duration
+    """
+    start = perf_counter()
+    lines = LineCounter(islice(iter_lines(os.path.dirname(path), os.path.basename(path)), line_offset, None),
+                        line_offset)
+    events = list(iter_events(lines, a_name, a_date, origins))
+    return events, lines.count, perf_counter() - start
+
+
+def fetch_archive(process_pool, source, tmp_dir, a_name, a_date, origins, line_offset):
+    """Downloads an archive (in a thread) and parses it (in a process).
+
+    :return: events, number of lines in archive, download and parse durations
+    """
+    start = perf_counter()
+    path = download_archive(source, a_name, tmp_dir)
+    download_duration = perf_counter() - start
+    try:
+        events, line_count, parse_duration = process_pool.\
+            submit(parse_archive_file, path, a_name, a_date, origins, line_offset).result()
+    finally:
+        if path.startswith(tmp_dir):
+            os.remove(path)
+    return events, line_count, download_duration, parse_duration
+
+
+def save_archive_events(checkpoint, a_date, origins, events, line_offset, with_description=False):
+    """Saves parsed events of an archive and its checkpoint in one transaction.
+
+    :return: number of saved launches
+    """
+    last_timestamp = max((event['timestamp'] for event in events), default=None)
+    if checkpoint.id is None and \
+       init_legacy_checkpoint(checkpoint, origins, a_date, len(events), line_offset, last_timestamp):
+        return 0
+    update_checkpoint(checkpoint, line_offset, len(events), last_timestamp)
+    if events:
+        save_launches_bulk(pd.DataFrame(events), with_description)
+    else:
+        db.session.commit()
+    return len(events)
+
+
+def parse_archives_parallel(source, archives, origins, with_description=False, workers=2):
+    """Downloads archives in a thread pool and parses them in a process pool concurrently.
+    Launches are saved by a single writer (current thread) in order of archives.
+
+    :param archives: list of (checkpoint, archive date)
+    :return: number of saved launches
+    """
+    total_count = 0
+    # release connections, they must not be shared with forked worker processes
+    db.session.commit()
+    db.engine.dispose()
+    with TemporaryDirectory() as tmp_dir, \
+            ThreadPoolExecutor(max_workers=workers) as thread_pool, \
+            ProcessPoolExecutor(max_workers=workers) as process_pool:
+        archives = iter(archives)
+        futures = deque()
+
+        def submit_next():
+            for checkpoint, a_date in archives:
+                future = thread_pool.submit(fetch_archive, process_pool, source, tmp_dir, checkpoint.archive_name,
+                                            a_date, origins, checkpoint.line_offset)
+                futures.append((checkpoint, a_date, future))
+                return
+
+        # keep at most 2 * workers parsed archives in memory
+        for _ in range(2 * workers):
+            submit_next()
+        while futures:
+            checkpoint, a_date, future = futures.popleft()
+            events, line_count, download_duration, parse_duration = future.result()
+            submit_next()
+            start = perf_counter()
+            new_launches_count = save_archive_events(checkpoint, a_date, origins, events, line_count,
+                                                     with_description)
+            total_count += new_launches_count
+            app.logger.info(f"parse_mybinder_archives: "
+                            f"saved {new_launches_count} new launches for {checkpoint.archive_name} - {a_date}, "
+                            f"download: {download_duration:.2f}s, parse: {parse_duration:.2f}s, "
+                            f"write: {perf_counter() - start:.2f}s")
+    return total_count
+
+
+def parse_mybinder_archives(binder='mybinder', all_events=False, with_description=False, excluded_origins=None,
+                            bulk=False, source=ARCHIVE_URL, stream=False, batch_size=10000, workers=1):
+    """Parses mybinder.org archives and saves launches of given binder.
+    Progress is saved in archive checkpoints, so only new lines of archives are parsed.
+    If workers > 1, archives are downloaded and parsed in parallel (see `parse_archives_parallel`).
+    """
     app.logger.info(f"parse_mybinder_archives: started at {datetime.utcnow()} [UTC]: "
-                    f"binder: {binder}, all_events: {all_events}, with_description: {with_description}")
+                    f"binder: {binder}, all_events: {all_events}, with_description: {with_description}, "
+                    f"bulk: {bulk}, source: {source}, stream: {stream}, workers: {workers}")
     with app.app_context():
         origins = list(app.binder_origins[binder]['origins'])
         if excluded_origins is not None:
@@ -65,113 +515,41 @@ def parse_mybinder_archives(binder='mybinder', all_events=False, with_descriptio
         else:
             # get last saved mybinder launch
             # parse archives after date of last launch, including current day and the day before
-            last_launch = BinderLaunch.query.\
-                          filter(BinderLaunch.origin.in_(origins)).\
-                          order_by(BinderLaunch.timestamp.desc()).first()  # with_entities(BinderLaunch.timestamp)
-            last_launch_date = last_launch.timestamp.date()
+            last_launch_date = get_launch_timestamp_query(origins, last=True).scalar().date()
         app.logger.info(f"parse_mybinder_archives: last_launch_date is {last_launch_date}")
 
         # get new or unfinished archives to parse
-        index = pd.read_json("https://archive.analytics.mybinder.org/index.jsonl", lines=True)
-        archives = []
-        for i, d in index.sort_index(ascending=True).iterrows():
-            if d['date'].date() >= last_launch_date-timedelta(days=1):
-                # make sure also that everything of previous day is saved
-                archives.append([d['name'], d['date'].date(), d['count']])
-
-        total_count = 0
-        for a_name, a_date, a_count in archives:
-            app.logger.info(f"parse_mybinder_archives: parsing {a_name}\n")
-            _frame = pd.read_json(f"https://archive.analytics.mybinder.org/{a_name}", lines=True)
-            if len(_frame) == 0:
-                app.logger.info(f"parse_mybinder_archives: "
-                                f"{a_date} is empty ({a_count})")
-                continue
+        # make sure also that everything of previous day is saved
+        archives = get_archives(source, last_launch_date-timedelta(days=1))
 
-            # events before 12.06.2019 has no origin value
-            if a_date <= datetime.strptime('11-6-2019', "%d-%m-%Y").date():
-                _frame['origin'] = 'mybinder.org'
-
-            # events-2019-06-12.jsonl has mixed rows: with and without origin value
-            if a_name == "events-2019-06-12.jsonl":
-                _frame['origin'].fillna('mybinder.org', inplace=True)
-            # in some archives Gist launches have wrong provider (GitHub)
-            elif a_name == "events-2018-11-25.jsonl":
-                _frame.loc[_frame['spec'] == "https%3A%2F%2Fgist.github.com%2Fjakevdp/256c3ad937af9ec7d4c65a29e5b6d454",
-                           "provider"] = "Gist"
-                _frame.loc[_frame['spec'] == "https%3A%2F%2Fgist.github.com%2Fjakevdp/256c3ad937af9ec7d4c65a29e5b6d454",
-                           "spec"] = "jakevdp/256c3ad937af9ec7d4c65a29e5b6d454"
-            elif a_name == "events-2019-01-28.jsonl":
-                _frame.loc[_frame['spec'] == "loicmarie/ade5ea460444ea0ff72d5c94daa14500",
-                           "provider"] = "Gist"
-            elif a_name == "events-2019-02-22.jsonl":
-                _frame.loc[_frame['spec'] == "minrk/6d61e5edfa4d2947b0ee8c1be8e79154",
-                           "provider"] = "Gist"
-            # get launches of mybinder federation of this date
-            frame = _frame.loc[_frame['origin'].isin(origins) &
-                               (_frame['timestamp'] >= datetime.combine(a_date, datetime.min.time())) &
-                               (_frame['timestamp'] <= datetime.combine(a_date, datetime.max.time()))]
-            app.logger.info(f"parse_mybinder_archives: "
-                            f"{len(_frame)} - {len(frame)} = {len(_frame) - len(frame)} "
-                            f"launches are excluded from {a_name}.")
-            # real archive count, because some archives have launch data from previous day (eg events-2019-02-22.jsonl)
-            a_count_real = len(frame)
-            a_count_diff = a_count - a_count_real
-            a_count = a_count_real
-            a_saved_query = BinderLaunch.query.\
-                            filter(BinderLaunch.origin.in_(origins),
-                                   func.DATE(BinderLaunch.timestamp) == a_date)
-            a_count_saved = a_saved_query.count()
-            if a_count_saved > a_count:
-                app.logger.error(f"parse_mybinder_archives: "
-                                 f"Error saved ({a_count_saved}) > in archive ({a_count}) for {a_name} - {a_date}")
-                continue
-            elif a_count_saved == a_count:
-                app.logger.info(f"parse_mybinder_archives: "
-                                f"everything is already saved. {a_count} - {a_count_saved} = {a_count-a_count_saved} "
-                                f"launches of {a_name} - {a_date}")
-                continue
-            app.logger.info(f"parse_mybinder_archives: "
-                            f"parsing {a_count} - {a_count_saved} = {a_count-a_count_saved} (?{a_count_diff}) "
-                            f"launches of {a_name} - {a_date}")
-
-            if len(frame) == 0:
-                app.logger.info(f"parse_mybinder_archives: "
-                                f"{a_date} is empty after filtering ({a_count})")
+        new_archives = []
+        for a_name, a_date, a_count in archives:
+            checkpoint = get_checkpoint(binder, a_name)
+            if checkpoint.id is not None and checkpoint.line_offset >= a_count:
+                app.logger.info(f"parse_mybinder_archives: everything is already saved. "
+                                f"{checkpoint.line_offset} lines ({checkpoint.row_count} launches) of {a_name}")
                 continue
+            new_archives.append((checkpoint, a_date))
 
-            if a_count_saved > 0:
-                a_saved_last_launch = a_saved_query.order_by(BinderLaunch.timestamp.desc()).first()
-                a_saved_last_launch_ts = a_saved_last_launch.timestamp
-                # delete launches of last launch in order to prevent double data in db
-                # they will be re-saved
-                # because archives are updated partially during the day and it is possible last launches in
-                # batch x have the same timestamp with first launches in batch x+1
-                # https://docs.sqlalchemy.org/en/latest/orm/query.html?highlight=delete#sqlalchemy.orm.query.Query.delete
-                deleted = BinderLaunch.query.\
-                          filter(BinderLaunch.origin.in_(origins)).\
-                          filter(BinderLaunch.timestamp == a_saved_last_launch_ts).\
-                          delete(synchronize_session=False)
-                db.session.commit()
-                sleep(30)
+        if workers > 1:
+            total_count = parse_archives_parallel(source, new_archives, origins, with_description, workers)
+        else:
+            total_count = 0
+            for checkpoint, a_date in new_archives:
+                a_name = checkpoint.archive_name
+                app.logger.info(f"parse_mybinder_archives: parsing {a_name} from line {checkpoint.line_offset}\n")
+                if stream is True:
+                    new_launches_count = parse_archive_stream(source, checkpoint, a_date, origins,
+                                                              with_description, batch_size)
+                else:
+                    new_launches_count = parse_archive(source, checkpoint, a_date, origins,
+                                                       with_description, bulk)
+                total_count += new_launches_count
                 app.logger.info(f"parse_mybinder_archives: "
-                                f"deleted last {deleted} launches at {a_saved_last_launch_ts} -> {a_name} - {a_date}")
-                frame = frame.loc[frame['timestamp'] >= a_saved_last_launch_ts]
-
-            new_launches_count = len(frame)
-            save_launches(frame, with_description)
-            app.logger.info(f"parse_mybinder_archives: "
-                            f"saved {new_launches_count} new launches for {a_name} - {a_date}")
-            total_count += new_launches_count
-            # sleeping half a minute is also good to catch container logs
-            sleep(30)
-            a_count_saved = BinderLaunch.query.\
-                            filter(BinderLaunch.origin.in_(origins),
-                                   func.DATE(BinderLaunch.timestamp) == a_date).\
-                            count()
-            app.logger.info(f"parse_mybinder_archives: "
-                            f"there are now total {a_count_saved} launches for {a_name} - {a_date}")
+                                f"saved {new_launches_count} new launches for {a_name} - {a_date}, there are now "
+                                f"total {checkpoint.row_count} launches until line {checkpoint.line_offset}")
+        if total_count:
+            invalidate_pages()
 
     app.logger.info(f"parse_mybinder_archives: done at {datetime.utcnow()} [UTC]: "
                     f"total {total_count} new launches saved")
-    sleep(60)
@@ -0,0 +1,77 @@
+from datetime import datetime
+from functools import wraps
+from hashlib import md5
+from uuid import uuid4
+from flask import request, make_response, g, has_request_context
+from . import app, cache
+
+GENERATION_KEY = 'launches_generation'
+SCOPE_GENERATION_KEY = 'page_generation/{}'
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = uuid4().hex
+        cache.set(GENERATION_KEY, generation, timeout=0)
+    return generation
+
+
+def invalidate_pages(scope=None):
+    """Invalidates cached pages, e.g. when new launches are saved.
+    If scope is given, only pages which depend on it (see `add_page_scope`) are invalidated, otherwise all pages.
+    Cached pages of old generation are not deleted, they just expire.
+    """
+    key = GENERATION_KEY if scope is None else SCOPE_GENERATION_KEY.format(scope)
+    cache.set(key, uuid4().hex, timeout=0)
+
+
+def add_page_scope(scope):
+    """Marks that the page being rendered depends on given scope, e.g. cache key of popular repos of a time range.
+    It must be called before the data of the scope is read.
+    """
+    if has_request_context() and 'page_scopes' in g and scope not in g.page_scopes:
+        g.page_scopes[scope] = cache.get(SCOPE_GENERATION_KEY.format(scope))
+
+
+def _is_fresh(scopes):
+    """Returns True if none of the scopes of a cached page are invalidated since it is rendered."""
+    if not scopes:
+        return True
+    keys = [SCOPE_GENERATION_KEY.format(scope) for scope in scopes]
+    return cache.get_many(*keys) == list(scopes.values())
+
+
+def _make_response(body, etag, last_modified):
+    response = make_response(body)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # browsers must revalidate, then they get 304 if page is not changed
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+
+def cached_page(view):
+    """Caches rendered page per url and selected binder for PAGE_CACHE_TIMEOUT seconds,
+    or until one of the scopes which the page depends on is invalidated.
+    Responses have ETag and Last-Modified headers, so conditional requests get 304.
+    """
+    @wraps(view)
+    def decorated_view(*args, **kwargs):
+        key = f"page/{get_generation()}/{request.path}/{request.cookies.get('selected_binder', '')}"
+        cached = cache.get(key)
+        if cached is None or not _is_fresh(cached[3]):
+            # scope -> generation, filled by add_page_scope while rendering
+            g.page_scopes = {}
+            body = view(*args, **kwargs)
+            scopes = g.pop('page_scopes')
+            if not isinstance(body, str):
+                # e.g. error responses are not cached
+                return body
+            body = body.encode('utf-8')
+            # last modified header has seconds precision
+            cached = (body, md5(body).hexdigest(), datetime.utcnow().replace(microsecond=0), scopes)
+            cache.set(key, cached, timeout=app.config['PAGE_CACHE_TIMEOUT'])
+        return _make_response(*cached[:3])
+    return decorated_view
@@ -0,0 +1,93 @@
+import os
+import pandas as pd
+from datetime import datetime, date, timedelta
+from . import app
+from .models import BinderLaunch
+
+PARQUET_EXPORT_COLUMNS = ['id', 'timestamp', 'schema', 'version', 'origin', 'provider', 'spec', 'status', 'repo_id']
+
+
+def get_day_path(output_dir, day):
+    # one directory per year, same as yearly partitions of binder_launch table
+    return os.path.join(output_dir, f"year={day.year}", f"launches-{day.isoformat()}.parquet")
+
+
+def get_exported_files(output_dir):
+    """Returns list of (year, file name, size) of exported parquet files in order of days."""
+    files = []
+    if not os.path.isdir(output_dir):
+        return files
+    for year_dir in sorted(os.listdir(output_dir)):
+        year_path = os.path.join(output_dir, year_dir)
+        if not year_dir.startswith('year=') or not os.path.isdir(year_path):
+            continue
+        for file_name in sorted(os.listdir(year_path)):
+            if file_name.startswith('launches-') and file_name.endswith('.parquet'):
+                files.append((year_dir, file_name, os.path.getsize(os.path.join(year_path, file_name))))
+    return files
+
+
+def get_last_exported_day(output_dir):
+    files = get_exported_files(output_dir)
+    if not files:
+        return None
+    return date.fromisoformat(files[-1][1][len('launches-'):-len('.parquet')])
+
+
+def export_day(output_dir, day, batch_size=10000):
+    """Writes launches of a day into a parquet file.
+
+    :return: number of exported launches
+    """
+    day_start = datetime.combine(day, datetime.min.time())
+    query = BinderLaunch.query.\
+            with_entities(*[getattr(BinderLaunch, c) for c in PARQUET_EXPORT_COLUMNS]).\
+            filter(BinderLaunch.timestamp >= day_start,
+                   BinderLaunch.timestamp < day_start + timedelta(days=1)).\
+            order_by(BinderLaunch.timestamp, BinderLaunch.id).\
+            yield_per(batch_size)
+    frame = pd.DataFrame([tuple(row) for row in query], columns=PARQUET_EXPORT_COLUMNS)
+    if len(frame) == 0:
+        return 0
+    path = get_day_path(output_dir, day)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write into a temporary file first, so that readers never see a partial file
+    tmp_path = path + '.tmp'
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return len(frame)
+
+
+def export_launches(output_dir=None, from_date=None):
+    """Exports launches into parquet files, one file per day, partitioned by year:
+    <output_dir>/year=<YYYY>/launches-<YYYY-MM-DD>.parquet
+
+    Only days since the last exported day are written. The last exported day is written again,
+    because it might have been exported before the day was complete.
+
+    :param output_dir: default is PARQUET_EXPORT_DIR
+    :param from_date: export days since this date (including), default is the last exported day
+    :return: number of exported launches
+    """
+    output_dir = output_dir or app.config['PARQUET_EXPORT_DIR']
+    with app.app_context():
+        if from_date is None:
+            from_date = get_last_exported_day(output_dir)
+        if from_date is None:
+            first_launch = BinderLaunch.query.with_entities(BinderLaunch.timestamp).\
+                           order_by(BinderLaunch.timestamp).first()
+            if first_launch is None:
+                return 0
+            from_date = first_launch[0].date()
+
+        total_count = 0
+        day = from_date
+        today = datetime.utcnow().date()
+        while day <= today:
+            count = export_day(output_dir, day)
+            if count:
+                app.logger.info(f"export_launches: exported {count} launches of {day}")
+            total_count += count
+            day += timedelta(days=1)
+    app.logger.info(f"export_launches: total {total_count} launches exported since {from_date} into {output_dir}")
+    return total_count
@@ -0,0 +1,87 @@
+import re
+from datetime import datetime, timedelta
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from . import app, db
+from .utilities_db import get_launches_query, get_launch_timestamp_query, _get_popular_repos_subquery
+from .mybinder_archives import get_saved_launches_query
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN of a select statement."""
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == 'sqlite' else "EXPLAIN "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def get_query_plan(statement):
+    """Returns query plan of given statement as lines of text."""
+    if db.engine.dialect.name != 'sqlite':
+        # tables can be small (e.g. in a fresh database), where a sequential scan is cheaper,
+        # but what we want to know is if the index can be used at all
+        db.session.execute("SET LOCAL enable_seqscan = off")
+    rows = db.session.execute(Explain(statement)).fetchall()
+    db.session.rollback()
+    # sqlite: (id, parent, notused, detail), postgresql: (QUERY PLAN, )
+    return [row[-1] for row in rows]
+
+
+def get_launch_queries():
+    """Returns hot queries of BinderLaunch table as (name, statement, index, ordered).
+    Name of each index is given without prefix and suffix, because indexes of partitions are named
+    differently, e.g. ix_binder_launch_timestamp_id and binder_launch_y2019_timestamp_id_idx.
+    ordered is True if rows must be read in order of the index, without sorting them.
+    """
+    to_dt = datetime.utcnow()
+    from_dt = to_dt - timedelta(days=1, minutes=30)
+    binder = next(iter(app.binder_origins))
+    origins = app.binder_origins[binder]['origins']
+    launch_count = _get_popular_repos_subquery(binder, from_dt.isoformat(), to_dt.isoformat())
+    return [
+        ("popular repos", db.session.query(launch_count).statement, "origin_timestamp_repo_id", False),
+        ("saved launches of archive", get_saved_launches_query(origins, from_dt.date()).statement,
+         "origin_timestamp_repo_id", False),
+        ("first launch", get_launch_timestamp_query().statement, "timestamp_id", True),
+        ("first launch of binder", get_launch_timestamp_query(origins).statement, "origin_timestamp_repo_id", True),
+        ("last launch of binder", get_launch_timestamp_query(origins, last=True).statement,
+         "origin_timestamp_repo_id", True),
+        ("launches", get_launches_query(from_dt, to_dt).statement, "timestamp_id", True),
+        ("launches of origin", get_launches_query(from_dt, to_dt, origins[0]).statement, "origin_timestamp_repo_id",
+         False),
+        ("launches of repo", get_launches_query(from_dt, to_dt, repo_id=1).statement, "repo_id_timestamp_id", True),
+    ]
+
+
+def is_full_scan(line):
+    """Returns True if given line of a query plan is a full scan of BinderLaunch table or one of its partitions."""
+    if db.engine.dialect.name == 'sqlite':
+        return re.search(r'\bSCAN (TABLE )?binder_launch\b', line) is not None and 'USING' not in line
+    return 'Seq Scan on binder_launch' in line
+
+
+def is_sort(line):
+    """Returns True if given line of a query plan sorts all rows, e.g. for ORDER BY."""
+    if db.engine.dialect.name == 'sqlite':
+        # "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY" only sorts rows with equal values of index columns
+        return 'USE TEMP B-TREE FOR ORDER BY' in line
+    return re.search(r'(^|->)\s*Sort\s+\(', line) is not None
+
+
+def check_launch_queries():
+    """Checks that hot queries of BinderLaunch table use the expected indexes and don't scan the whole table,
+    and that ordered queries don't sort their rows.
+
+    :return: list of (name, query plan, passed)
+    """
+    results = []
+    for name, statement, index, ordered in get_launch_queries():
+        plan = get_query_plan(statement)
+        passed = any(index in line for line in plan) and not any(is_full_scan(line) for line in plan) and \
+            not (ordered and any(is_sort(line) for line in plan))
+        results.append((name, plan, passed))
+    return results
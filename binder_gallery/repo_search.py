@@ -0,0 +1,118 @@
+import re
+from sqlalchemy import column, func, literal_column, text
+from . import cache, db
+from .models import Repo
+from .utilities_db import popular_repos_query, popular_repos_from_query
+
+# search index of repos over provider_namespace (provider prefix, org and repo name) and description:
+# postgresql: trigram (pg_trgm) index for substring matching
+# sqlite: FTS5 table (repo_search) for prefix matching of words, it is kept in sync with repo table by triggers
+# without these indexes (e.g. in a database created with `db.create_all()`) repos are scanned
+# NOTE migration d72d63e1f6e4 has its own copy of these statements, changes need a new migration
+SEARCH_TABLE = 'repo_search'
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE repo_search USING fts5(provider_namespace, description, content='repo', content_rowid='id')",
+    "CREATE TRIGGER repo_search_insert AFTER INSERT ON repo BEGIN "
+    "INSERT INTO repo_search (rowid, provider_namespace, description) "
+    "VALUES (new.id, new.provider_namespace, new.description); END",
+    "CREATE TRIGGER repo_search_delete AFTER DELETE ON repo BEGIN "
+    "INSERT INTO repo_search (repo_search, rowid, provider_namespace, description) "
+    "VALUES ('delete', old.id, old.provider_namespace, old.description); END",
+    "CREATE TRIGGER repo_search_update AFTER UPDATE OF provider_namespace, description ON repo BEGIN "
+    "INSERT INTO repo_search (repo_search, rowid, provider_namespace, description) "
+    "VALUES ('delete', old.id, old.provider_namespace, old.description); "
+    "INSERT INTO repo_search (rowid, provider_namespace, description) "
+    "VALUES (new.id, new.provider_namespace, new.description); END",
+    # index existing repos
+    "INSERT INTO repo_search (repo_search) VALUES ('rebuild')",
+]
+POSTGRESQL_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # same expression as `get_search_text`
+    "CREATE INDEX ix_repo_search_trgm ON repo "
+    "USING gin (lower(provider_namespace || ' ' || coalesce(description, '')) gin_trgm_ops)",
+]
+# words shorter than this are ignored, they match too many repos
+MIN_TERM_LENGTH = 2
+MAX_TERMS = 5
+
+# database url -> if sqlite database has the search table
+_has_search_table = {}
+
+
+def create_search_index(connection):
+    """Creates the search index of repos and indexes existing repos.
+    SQLite must be compiled with FTS5, otherwise no index is created.
+
+    :param connection: an engine or a connection, e.g. of a migration
+    """
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        statements = POSTGRESQL_SEARCH_DDL
+    elif dialect == 'sqlite' and connection.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar():
+        statements = SQLITE_SEARCH_DDL
+    else:
+        return
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def drop_search_index(connection):
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        connection.execute(text("DROP INDEX IF EXISTS ix_repo_search_trgm"))
+    elif dialect == 'sqlite':
+        for action in ['insert', 'delete', 'update']:
+            connection.execute(text(f"DROP TRIGGER IF EXISTS repo_search_{action}"))
+        connection.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+
+
+def has_search_table():
+    """Returns True if the database is sqlite and has the FTS5 search table."""
+    url = str(db.engine.url)
+    if url not in _has_search_table:
+        _has_search_table[url] = db.engine.dialect.name == 'sqlite' and db.session.execute(
+            text("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': SEARCH_TABLE}).scalar() > 0
+    return _has_search_table[url]
+
+
+def get_search_terms(query):
+    """Splits a search query into lowercase words, e.g. "jupyter/Notebook-tutorial" -> jupyter, notebook, tutorial."""
+    terms = [term for term in re.findall(r'\w+', query.lower()) if len(term) >= MIN_TERM_LENGTH]
+    return terms[:MAX_TERMS]
+
+
+def get_search_text():
+    """Returns the sql expression which is searched (and indexed in postgresql)."""
+    return func.lower(Repo.provider_namespace.op('||')(literal_column("' '")).
+                      op('||')(func.coalesce(Repo.description, literal_column("''"))))
+
+
+@cache.memoize(timeout=60)
+def search_repos(query, limit=10):
+    """Searches repos which contain all words of the query in their provider_namespace (provider prefix,
+    org and repo name) or description. With sqlite (FTS5), words are matched as prefixes of words,
+    otherwise anywhere in text. Repos are ordered by their total launch count.
+
+    :return: list of PopularRepo, launch_count is the total launch count of a repo
+    """
+    terms = get_search_terms(query)
+    if not terms:
+        return []
+    repos = popular_repos_query(Repo.launch_count)
+    if has_search_table():
+        # match all words as prefixes, e.g. "jupyter"* "tutorial"*
+        match = ' '.join(f'"{term}"*' for term in terms)
+        matches = text(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match").\
+            bindparams(match=match).\
+            columns(column('rowid'))
+        repos = repos.filter(Repo.id.in_(matches))
+    else:
+        search_text = get_search_text()
+        for term in terms:
+            # "_" is a wildcard in LIKE
+            term = term.replace('_', '\\_')
+            repos = repos.filter(search_text.like(f'%{term}%', escape='\\'))
+    repos = repos.order_by(Repo.launch_count.desc(), Repo.id).limit(limit)
+    return popular_repos_from_query(repos)
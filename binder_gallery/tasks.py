@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from flask import has_app_context
+from . import app, db
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config['BACKGROUND_WORKERS'],
+                                           thread_name_prefix='bg_task')
+    return _executor
+
+
+def _run(func, *args, **kwargs):
+    with app.app_context():
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            app.logger.error(f"Error: background task {func.__name__}{args} failed: {e}")
+            db.session.rollback()
+
+
+def submit(func, *args, **kwargs):
+    """Runs given function in a background thread with application context.
+    If BACKGROUND_WORKERS is 0, function runs immediately in current thread (e.g. for tests).
+
+    :return: a Future or result of the function
+    """
+    if app.config['BACKGROUND_WORKERS'] == 0:
+        if has_app_context():
+            # use the app context (and db session) of the caller
+            return func(*args, **kwargs)
+        return _run(func, *args, **kwargs)
+    return get_executor().submit(_run, func, *args, **kwargs)
@@ -1,8 +1,52 @@
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from math import log2
+from collections import Counter, namedtuple
 from datetime import datetime, timedelta
+from threading import Lock
 from sqlalchemy.orm import load_only
-from sqlalchemy import desc, func
-from . import cache, app
-from .models import BinderLaunch, CreatedByGesis, FeaturedProject, Repo
+from sqlalchemy import desc, func, union_all, bindparam, literal_column, or_, and_, select
+from . import cache, app, db
+from .models import BinderLaunch, CreatedByGesis, FeaturedProject, Repo, HourlyLaunchCount, DailyLaunchCount, \
+    OriginLaunchCount, TotalLaunchCount, get_namespace_fields
+from .tasks import submit
+from .page_cache import invalidate_pages, add_page_scope
+
+LAUNCH_COUNT_MODELS = [HourlyLaunchCount, DailyLaunchCount]
+# max number of values in an IN clause
+CHUNK_SIZE = 500
+LAUNCH_EXPORT_COLUMNS = ['timestamp', 'schema', 'version', 'origin', 'provider', 'spec', 'status']
+EPOCH = datetime(1970, 1, 1)
+# a row of popular repos, it can be also used as list: [repo_name, org, ..., launch_count]
+PopularRepo = namedtuple('PopularRepo', ['repo_name', 'org', 'provider', 'repo_url', 'binder_url', 'description',
+                                         'launch_count'])
+
+
+
+def popular_repos_query(launch_count):
+    """Returns query of columns of popular repos (see `popular_repos_from_query`) with given launch count column."""
+    return db.session.query(Repo.repo_name, Repo.org, Repo.provider, Repo.repo_url,
+                            Repo.provider_namespace, Repo.last_ref, Repo.description, launch_count)
+
+
+def popular_repos_from_query(query):
+    """Executes given query (see `popular_repos_query`) as core statement, rows are read straight from the cursor
+    without ORM processing.
+
+    :return: list of PopularRepo, binder_url is None for repos without provider
+    """
+    binder_url_prefix = f'{app.default_binder_url}/v2/'
+    get_provider_spec = Repo.get_provider_spec
+    return [PopularRepo(repo_name, org, provider, repo_url,
+                        binder_url_prefix + get_provider_spec(provider, provider_namespace, last_ref)
+                        if provider else None,
+                        description, int(launch_count))
+            for repo_name, org, provider, repo_url, provider_namespace, last_ref, description, launch_count
+            in db.session.execute(query.statement)]
+
+
+_popular_repos_lock = Lock()
+# keys of popular repos which are being computed in background by this process
+_pending_popular_repos = set()
 
 
 def get_projects(table):
@@ -41,79 +85,259 @@ def get_all_projects():
     return all_projects
 
 
-def _get_popular_repos(binder, from_dt, to_dt=None):
-    """Gets launched repos from BinderLaunch table in a given time range
+def _split_time_range(from_dt, to_dt):
+    """Splits a time range into parts which are served by launch count rollups and
+    edge parts which must be counted over raw launches.
+
+    :return: list of (model, start, end, end_inclusive), model is BinderLaunch for raw parts
+    """
+    hour_start = HourlyLaunchCount.get_bucket(from_dt)
+    if hour_start < from_dt:
+        hour_start += timedelta(hours=1)
+    hour_end = HourlyLaunchCount.get_bucket(to_dt)
+    if hour_start >= hour_end:
+        # range doesn't cover a complete hour
+        return [(BinderLaunch, from_dt, to_dt, True)]
+
+    day_start = DailyLaunchCount.get_bucket(hour_start)
+    if day_start < hour_start:
+        day_start += timedelta(days=1)
+    day_end = DailyLaunchCount.get_bucket(hour_end)
+    if day_start < day_end:
+        parts = [(HourlyLaunchCount, hour_start, day_start, False),
+                 (DailyLaunchCount, day_start, day_end, False),
+                 (HourlyLaunchCount, day_end, hour_end, False)]
+    else:
+        parts = [(HourlyLaunchCount, hour_start, hour_end, False)]
+    parts = [(BinderLaunch, from_dt, hour_start, False)] + parts + [(BinderLaunch, hour_end, to_dt, True)]
+    return [p for p in parts if p[1] < p[2] or p[3] is True]
+
+
+def _get_launch_counts_subquery(origins, from_dt=None, to_dt=None):
+    """Returns a subquery with columns (repo_id, launch_count) for launches in given time range.
+    Complete days and hours are summed over launch count rollups and only the partial hours
+    at the edges of the time range are counted over BinderLaunch table.
+
+    :param origins: list of origins or None for all origins
+    :param from_dt: beginning of time range (datetime) or None for all time
+    :param to_dt: end of time range (datetime)
+    """
+    if from_dt is None:
+        parts = [(DailyLaunchCount, None, None, False)]
+    else:
+        parts = _split_time_range(from_dt, to_dt)
+
+    queries = []
+    for model, start, end, end_inclusive in parts:
+        if model is BinderLaunch:
+            query = BinderLaunch.query.\
+                    with_entities(BinderLaunch.repo_id.label('repo_id'),
+                                  func.count(BinderLaunch.id).label('launch_count')).\
+                    filter(BinderLaunch.timestamp >= start)
+            if end_inclusive is True:
+                query = query.filter(BinderLaunch.timestamp <= end)
+            else:
+                query = query.filter(BinderLaunch.timestamp < end)
+        else:
+            query = model.query.\
+                    with_entities(model.repo_id.label('repo_id'),
+                                  func.sum(model.launch_count).label('launch_count'))
+            if start is not None:
+                query = query.filter(model.bucket >= start, model.bucket < end)
+        if origins is not None:
+            query = query.filter(model.origin.in_(origins))
+        queries.append(query.group_by(model.repo_id))
+
+    if len(queries) == 1:
+        return queries[0].subquery()
+    counts = union_all(*[q.statement for q in queries]).alias()
+    return db.session.query(counts.c.repo_id.label('repo_id'),
+                            func.sum(counts.c.launch_count).label('launch_count')).\
+        group_by(counts.c.repo_id).\
+        subquery()
+
+
+def _get_popular_repos_subquery(binder, from_dt, to_dt=None):
+    """Returns subquery of (repo_id, launch_count) of launched repos in a given time range.
+    Launch counts of all time are read from launch counters of repos."""
+    origins = None if binder == "all" else app.binder_origins[binder]['origins']
+
+    if from_dt is None and to_dt is None:
+        if origins is None:
+            return db.session.query(Repo.id.label('repo_id'), Repo.launch_count.label('launch_count')).\
+                   filter(Repo.launch_count > 0).\
+                   subquery()
+        return db.session.query(OriginLaunchCount.repo_id.label('repo_id'),
+                                func.sum(OriginLaunchCount.launch_count).label('launch_count')).\
+               filter(OriginLaunchCount.origin.in_(origins)).\
+               group_by(OriginLaunchCount.repo_id).\
+               subquery()
+
+    from_dt = datetime.fromisoformat(from_dt)
+    if to_dt is None:
+        # until now
+        to_dt = datetime.utcnow()
+    else:
+        to_dt = datetime.fromisoformat(to_dt)
+    return _get_launch_counts_subquery(origins, from_dt, to_dt)
+
+
+def _get_popular_repos(binder, from_dt, to_dt=None, limit=None):
+    """Gets launched repos in a given time range
     and aggregates them over launch count in order according to launch count.
+    Launch counts are read from hourly and daily rollups or repo counters, see `_get_popular_repos_subquery`.
     :param binder: origin binder name
     :param from_dt: beginning of time range
     :param to_dt: end of time range
+    :param limit: max number of repos, they are sorted and limited in database
     :return: list of popular repos, ordered by launch count,
-    an item in list: [repo_name,org,provider,repo_url,binder_url,description,launch_count]
+    an item in list: PopularRepo(repo_name,org,provider,repo_url,binder_url,description,launch_count)
     :rtype: list
     """
-    subquery = BinderLaunch.query.\
-               with_entities(BinderLaunch.repo_id,
-                             func.count(BinderLaunch.id).label('launch_count'),
-                             # func.array_agg(BinderLaunch.spec.distinct()).label('specs')
-                             ).\
-               group_by(BinderLaunch.repo_id)
-               # order_by(desc("launch_count"))
-
-    if binder != "all":
-        subquery = subquery.filter(BinderLaunch.origin.in_(app.binder_origins[binder]['origins']))
-
-    if from_dt is not None or to_dt is not None:
-        from_dt = datetime.fromisoformat(from_dt)
-        if to_dt is None:
-            # until now
-            to_dt = datetime.utcnow()
+    subquery = _get_popular_repos_subquery(binder, from_dt, to_dt)
+    query = popular_repos_query(subquery.c.launch_count).\
+            filter(Repo.id == subquery.c.repo_id).\
+            order_by(subquery.c.launch_count.desc(), Repo.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return popular_repos_from_query(query)
+
+
+def _get_top_repos(binder, from_dt, to_dt=None, limit=5):
+    """Gets top repos in a given time range, number of launched repos and total launch count.
+    Only `limit` repos are fetched, number of repos and total launch count are counted in database.
+    :return: (list of top repos (see `_get_popular_repos`), number of repos, total launch count)
+    :rtype: tuple
+    """
+    subquery = _get_popular_repos_subquery(binder, from_dt, to_dt)
+    repos_count, total_launches = db.session.query(func.count(subquery.c.repo_id),
+                                                   func.sum(subquery.c.launch_count)).one()
+    return _get_popular_repos(binder, from_dt, to_dt, limit), repos_count, int(total_launches or 0)
+
+
+def get_time_range_delta(time_range):
+    """Returns timedelta of given time range, e.g. "24h", "7d" or "30m"."""
+    if time_range.endswith('h'):
+        p = {'hours': int(time_range.split('h')[0])}
+    elif time_range.endswith('d'):
+        p = {'days': int(time_range.split('d')[0])}
+    elif time_range.endswith('m'):
+        p = {'minutes': int(time_range.split('m')[0])}
+    else:
+        raise ValueError('Time range must be in minutes [m] or hours [h] or days [d].')
+    return timedelta(**p)
+
+
+def get_bucket_end(time_range, now=None):
+    """Snaps given time (default is now) to the beginning of its bucket.
+    Bucket sizes of time ranges are defined in POPULAR_REPOS_BUCKETS (in seconds).
+    """
+    seconds = app.config['POPULAR_REPOS_BUCKETS'].get(time_range, 60)
+    seconds_since_epoch = ((now or datetime.utcnow()) - EPOCH).total_seconds()
+    return EPOCH + timedelta(seconds=seconds_since_epoch // seconds * seconds)
+
+
+def compute_per_bucket(key, func, binder, time_range, bucket_end, *args):
+    """Calls func for time range which ends at bucket_end and saves the result into cache."""
+    try:
+        if time_range == "all":
+            to_dt = None
+            from_dt = None
         else:
-            to_dt = datetime.fromisoformat(to_dt)
-        # to get launch counts in given time range
-        subquery = subquery.filter(BinderLaunch.timestamp.between(from_dt, to_dt))
-    # subquery = subquery.limit(5).subquery()
-    subquery = subquery.subquery()
-    repos = Repo.query.filter(Repo.id == subquery.c.repo_id).add_columns(subquery.c.launch_count,
-                                                                         # subquery.c.specs
-                                                                         ).all()
-
-    data = []
-    for repo, launch_count in repos:
-        org, repo_name = repo.repo_namespace
-        data.append([repo_name, org, repo.provider, repo.repo_url, repo.binder_url, repo.description, launch_count])
-        # data.append([repo_name, org, repo.provider, repo.repo_url, repo.get_binder_url(specs[-1]), repo.description, launch_count])
-    data.sort(key=lambda x: x[-1], reverse=True)
+            to_dt = bucket_end
+            from_dt = to_dt - get_time_range_delta(time_range)
+            to_dt = to_dt.isoformat()
+            from_dt = from_dt.isoformat()
+        data = func(binder, from_dt, to_dt, *args)
+        cached = cache.get(key)
+        cache.set(key, (bucket_end, data), timeout=0)
+        if cached is not None and cached[1] != data:
+            # only pages which are rendered with the previous result
+            invalidate_pages(key)
+        return data
+    finally:
+        with _popular_repos_lock:
+            _pending_popular_repos.discard(key)
+
+
+def get_per_bucket(key, func, binder, time_range, *args):
+    """Returns result of func(binder, from_dt, to_dt, *args) for given time range.
+    Time range is snapped to bucket boundaries (see `get_bucket_end`) and result is cached per bucket.
+    When the bucket of cached result is over, cached result is returned
+    and result of the current bucket is computed in background.
+    """
+    if time_range != "all":
+        # validate time range
+        get_time_range_delta(time_range)
+    bucket_end = get_bucket_end(time_range)
+    add_page_scope(key)
+    cached = cache.get(key)
+    if cached is None:
+        return compute_per_bucket(key, func, binder, time_range, bucket_end, *args)
+    cached_bucket_end, data = cached
+    if cached_bucket_end < bucket_end:
+        with _popular_repos_lock:
+            pending = key in _pending_popular_repos
+            _pending_popular_repos.add(key)
+        if not pending:
+            submit(compute_per_bucket, key, func, binder, time_range, bucket_end, *args)
     return data
 
 
 def get_popular_repos(binder, time_range):
-    """Gets popular repos in given time range.
+    """Gets popular repos in given time range, see `get_per_bucket`.
 
     :param binder: origin binder name
     :param time_range: the interval to get popular repos
     """
-    if time_range == "all":
-        to_dt = None
-        from_dt = None
-    else:
-        if time_range.endswith('h'):
-            p = {'hours': int(time_range.split('h')[0])}
-        elif time_range.endswith('d'):
-            p = {'days': int(time_range.split('d')[0])}
-        elif time_range.endswith('m'):
-            p = {'minutes': int(time_range.split('m')[0])}
-        else:
-            raise ValueError('Time range must be in minutes [m] or hours [h] or days [d].')
+    return get_per_bucket(f"popular_repos/{binder}/{time_range}", _get_popular_repos, binder, time_range)
 
-        to_dt = datetime.utcnow()
-        from_dt = to_dt - timedelta(**p)
-        to_dt = to_dt.isoformat()
-        from_dt = from_dt.isoformat()
 
-    return _get_popular_repos(binder, from_dt, to_dt)
+def get_top_repos(binder, time_range, limit=5):
+    """Gets top repos in given time range, see `get_per_bucket` and `_get_top_repos`.
+
+    :param binder: origin binder name
+    :param time_range: the interval to get popular repos
+    :param limit: number of top repos
+    :return: (list of top repos, number of repos, total launch count)
+    """
+    return get_per_bucket(f"top_repos/{binder}/{time_range}/{limit}", _get_top_repos, binder, time_range, limit)
+
 
+@cache.memoize(timeout=60)
+def get_trending_repos(limit=10):
+    """Gets repos with highest trending scores (see `Repo.trending_score`).
 
-def get_launches_query(from_dt, to_dt=None, origin=None):
+    :return: list of PopularRepo, launch_count is the total launch count of a repo
+    """
+    query = popular_repos_query(Repo.launch_count).\
+            filter(Repo.trending_score.isnot(None)).\
+            order_by(Repo.trending_score.desc(), Repo.id).\
+            limit(limit)
+    return popular_repos_from_query(query)
+
+
+def filter_popular_repos(popular_repos, search=None, order_column=6, order_desc=True):
+    """Filters and sorts popular repos, e.g. for server-side processing of DataTables.
+
+    :param popular_repos: list of popular repos, see `_get_popular_repos`
+    :param search: case-insensitive text to search in repo name, org and provider
+    :param order_column: index of column to sort by
+    :param order_desc: sort in descending order
+    :return: list of popular repos
+    """
+    # repo name, org and provider are NULL, if provider_namespace of repo couldn't be parsed
+    if search:
+        search = search.lower()
+        popular_repos = [r for r in popular_repos
+                         if any(search in (r[i] or "").lower() for i in range(3))]
+    if order_column == 6:
+        # popular repos are already ordered by launch count
+        return popular_repos if order_desc else popular_repos[::-1]
+    return sorted(popular_repos, key=lambda r: (r[order_column] or "").lower(), reverse=order_desc)
+
+
+def get_launches_query(from_dt, to_dt=None, origin=None, repo_id=None):
     if to_dt is None:
         to_dt = datetime.utcnow()
 
@@ -122,6 +346,8 @@ def get_launches_query(from_dt, to_dt=None, origin=None):
         order_by(BinderLaunch.timestamp, BinderLaunch.id)
     if origin is not None:
         query = query.filter_by(origin=origin)
+    if repo_id is not None:
+        query = query.filter_by(repo_id=repo_id)
 
     return query
 
@@ -141,6 +367,54 @@ def get_launches_paginated(from_dt, to_dt=None, origin=None):
     return launches
 
 
+def encode_cursor(launch):
+    """Returns an opaque cursor which points to given launch in order of (timestamp, id)."""
+    return urlsafe_b64encode(f"{launch.timestamp.isoformat()}|{launch.id}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Returns (timestamp, id) of a cursor. Raises ValueError if cursor is not valid."""
+    try:
+        timestamp, id_ = urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(id_)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def get_launches_after(from_dt, to_dt=None, origin=None, cursor=None, per_page=None, repo_id=None):
+    """Get a page of launches in given time range ordered by (timestamp, id) with keyset pagination:
+    page starts after the launch of the cursor, so there is no OFFSET and no COUNT query.
+
+    :param cursor: cursor returned for previous page, None for first page
+    :param repo_id: only launches of this repo, None for all repos
+    :return: list of launches and cursor for next page (None if this is the last page)
+    """
+    per_page = per_page or app.config.get("PER_PAGE", 100)
+    query = get_launches_query(from_dt, to_dt, origin, repo_id)
+    if cursor is not None:
+        timestamp, id_ = decode_cursor(cursor)
+        query = query.filter(or_(BinderLaunch.timestamp > timestamp,
+                                 and_(BinderLaunch.timestamp == timestamp, BinderLaunch.id > id_)))
+    # get one more launch to know if there is a next page
+    launches = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(launches) > per_page:
+        launches = launches[:per_page]
+        next_cursor = encode_cursor(launches[-1])
+    return launches, next_cursor
+
+
+def iter_launch_rows(from_dt, to_dt=None, origin=None, batch_size=1000):
+    """Yields launches in given time range ordered by timestamp as tuples of `LAUNCH_EXPORT_COLUMNS`.
+    Rows are fetched in batches with a server-side cursor (on postgresql), so memory usage is constant.
+    """
+    query = get_launches_query(from_dt, to_dt, origin).\
+            with_entities(*[getattr(BinderLaunch, c) for c in LAUNCH_EXPORT_COLUMNS]).\
+            yield_per(batch_size)
+    for row in query:
+        yield tuple(row)
+
+
 def get_launches(from_dt, to_dt=None, origin=None):
     """Get launches from BinderLaunch table in given time range ordered by timestamp."""
     query = get_launches_query(from_dt, to_dt, origin)
@@ -149,6 +423,383 @@ def get_launches(from_dt, to_dt=None, origin=None):
     return launches
 
 
+def add_trending_score(score, timestamp, count):
+    """Adds launches to a trending score (see `Repo.trending_score`) and returns the new score.
+    Each launch is weighted with 2^((timestamp - EPOCH) / TRENDING_HALF_LIFE),
+    so older launches weigh exponentially less, and the sum is stored as log2.
+
+    :param score: current score, None if repo has no launches
+    :param count: number of launches at given time, negative count removes launches
+    :return: new score, None if there are no launches left
+    """
+    if count == 0:
+        return score
+    weight = (timestamp - EPOCH).total_seconds() / app.config['TRENDING_HALF_LIFE'] + log2(abs(count))
+    if count > 0:
+        if score is None:
+            return weight
+        # log2(2^score + 2^weight) without overflow
+        return max(score, weight) + log2(1 + 2 ** -abs(score - weight))
+    if score is None or weight >= score:
+        return None
+    remaining = 1 - 2 ** (weight - score)
+    # remaining launches can be lost in floating point precision
+    return score + log2(remaining) if remaining > 1e-9 else None
+
+
+def add_repo_counters(counts):
+    """Adds given counts into launch counters of repos (launch count, first and last launch, trending score)
+    and into total launch counts per origin. Doesn't commit.
+    Repo rows are locked until commit, so that concurrent writers update counters of a repo one after another.
+    First and last launch are not changed, when launches are subtracted.
+
+    :param counts: dict of (repo_id, origin, timestamp) -> number of launches, can be negative
+    """
+    origin_counts = Counter()
+    # repo_id -> [launch count, first launch, last launch, {hour: launch count}]
+    repo_counts = {}
+    for (repo_id, origin, timestamp), count in counts.items():
+        if repo_id is None or count == 0:
+            continue
+        origin_counts[(repo_id, origin or "")] += count
+        repo_count = repo_counts.setdefault(repo_id, [0, None, None, Counter()])
+        repo_count[0] += count
+        # trending scores are computed over hourly buckets, same as in `rebuild_repo_counters`
+        repo_count[3][HourlyLaunchCount.get_bucket(timestamp)] += count
+        if count > 0:
+            repo_count[1] = timestamp if repo_count[1] is None else min(repo_count[1], timestamp)
+            repo_count[2] = timestamp if repo_count[2] is None else max(repo_count[2], timestamp)
+    if not repo_counts:
+        return
+
+    # lock repos in order of id, so that concurrent writers don't deadlock
+    repo_ids = sorted(repo_counts)
+    updates = []
+    for i in range(0, len(repo_ids), CHUNK_SIZE):
+        rows = db.session.query(Repo.id, Repo.launch_count, Repo.first_launch, Repo.last_launch,
+                                Repo.trending_score).\
+               filter(Repo.id.in_(repo_ids[i:i+CHUNK_SIZE])).\
+               order_by(Repo.id).\
+               with_for_update().\
+               all()
+        for repo_id, launch_count, first_launch, last_launch, trending_score in rows:
+            count, first, last, hourly_counts = repo_counts[repo_id]
+            for hour, hour_count in sorted(hourly_counts.items()):
+                trending_score = add_trending_score(trending_score, hour, hour_count)
+            if first is not None:
+                first_launch = first if first_launch is None else min(first_launch, first)
+                last_launch = last if last_launch is None else max(last_launch, last)
+            updates.append({'b_id': repo_id,
+                            'b_launch_count': (launch_count or 0) + count,
+                            'b_first_launch': first_launch,
+                            'b_last_launch': last_launch,
+                            'b_trending_score': trending_score})
+    table = Repo.__table__
+    db.session.execute(table.update().
+                       where(table.c.id == bindparam('b_id')).
+                       values(launch_count=bindparam('b_launch_count'),
+                              first_launch=bindparam('b_first_launch'),
+                              last_launch=bindparam('b_last_launch'),
+                              trending_score=bindparam('b_trending_score')),
+                       updates)
+
+    origin_counts = {key: count for key, count in origin_counts.items() if count != 0}
+    existing = {}
+    for i in range(0, len(repo_ids), CHUNK_SIZE):
+        rows = OriginLaunchCount.query.\
+               with_entities(OriginLaunchCount.id, OriginLaunchCount.repo_id, OriginLaunchCount.origin).\
+               filter(OriginLaunchCount.repo_id.in_(repo_ids[i:i+CHUNK_SIZE])).\
+               all()
+        for id_, repo_id, origin in rows:
+            existing[(repo_id, origin)] = id_
+    table = OriginLaunchCount.__table__
+    updates, inserts = [], []
+    for (repo_id, origin), count in origin_counts.items():
+        if (repo_id, origin) in existing:
+            updates.append({'b_id': existing[(repo_id, origin)], 'b_count': count})
+        else:
+            inserts.append({'repo_id': repo_id, 'origin': origin, 'launch_count': count})
+    if updates:
+        db.session.execute(table.update().
+                           where(table.c.id == bindparam('b_id')).
+                           values(launch_count=table.c.launch_count + bindparam('b_count')),
+                           updates)
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+    if any(count < 0 for count in origin_counts.values()):
+        OriginLaunchCount.query.filter(OriginLaunchCount.launch_count <= 0).delete(synchronize_session=False)
+
+
+def add_origin_counts(counts):
+    """Adds given counts into total launch counts per origin. Doesn't commit.
+
+    :param counts: dict of (repo_id, origin, timestamp) -> number of launches, can be negative
+    """
+    origin_counts = Counter()
+    for (_, origin, _), count in counts.items():
+        origin_counts[origin or ""] += count
+    origin_counts = {origin: count for origin, count in origin_counts.items() if count != 0}
+    if not origin_counts:
+        return
+
+    # there are only a few origins
+    existing = dict(TotalLaunchCount.query.
+                    with_entities(TotalLaunchCount.origin, TotalLaunchCount.id).
+                    filter(TotalLaunchCount.origin.in_(list(origin_counts))).
+                    all())
+    table = TotalLaunchCount.__table__
+    updates, inserts = [], []
+    for origin, count in origin_counts.items():
+        if origin in existing:
+            updates.append({'b_id': existing[origin], 'b_count': count})
+        else:
+            inserts.append({'origin': origin, 'launch_count': count})
+    if updates:
+        db.session.execute(table.update().
+                           where(table.c.id == bindparam('b_id')).
+                           values(launch_count=table.c.launch_count + bindparam('b_count')),
+                           updates)
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+    if any(count < 0 for count in origin_counts.values()):
+        TotalLaunchCount.query.filter(TotalLaunchCount.launch_count <= 0).delete(synchronize_session=False)
+
+
+def add_launch_counts(counts):
+    """Adds given counts into hourly and daily launch count rollups, into launch counters of repos
+    (see `add_repo_counters`) and into total launch counts per origin. Doesn't commit.
+
+    :param counts: dict of (repo_id, origin, timestamp) -> number of launches, can be negative
+    """
+    # first lock repos, so that concurrent writers of same repos wait for each other
+    add_repo_counters(counts)
+    add_origin_counts(counts)
+    for model in LAUNCH_COUNT_MODELS:
+        bucket_counts = Counter()
+        for (repo_id, origin, timestamp), count in counts.items():
+            if repo_id is not None:
+                bucket_counts[(repo_id, origin or "", model.get_bucket(timestamp))] += count
+        bucket_counts = {key: count for key, count in bucket_counts.items() if count != 0}
+        if not bucket_counts:
+            continue
+
+        # get existing rows with one query per chunk of repos
+        buckets = [key[2] for key in bucket_counts]
+        repo_ids = list({key[0] for key in bucket_counts})
+        existing = {}
+        for i in range(0, len(repo_ids), CHUNK_SIZE):
+            rows = model.query.\
+                   with_entities(model.id, model.repo_id, model.origin, model.bucket).\
+                   filter(model.repo_id.in_(repo_ids[i:i+CHUNK_SIZE]),
+                          model.bucket.between(min(buckets), max(buckets))).\
+                   all()
+            for id_, repo_id, origin, bucket in rows:
+                existing[(repo_id, origin, bucket)] = id_
+
+        table = model.__table__
+        updates, inserts = [], []
+        for (repo_id, origin, bucket), count in bucket_counts.items():
+            if (repo_id, origin, bucket) in existing:
+                updates.append({'b_id': existing[(repo_id, origin, bucket)], 'b_count': count})
+            else:
+                inserts.append({'repo_id': repo_id, 'origin': origin, 'bucket': bucket, 'launch_count': count})
+        if updates:
+            # increment in database, so concurrent writers don't overwrite each other
+            db.session.execute(table.update().
+                               where(table.c.id == bindparam('b_id')).
+                               values(launch_count=table.c.launch_count + bindparam('b_count')),
+                               updates)
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+        if any(count < 0 for count in bucket_counts.values()):
+            model.query.filter(model.launch_count <= 0).delete(synchronize_session=False)
+
+
+def update_launch_counts(launches):
+    """Updates launch count rollups with new launches. Launches must be already added to session
+    with their repos. Doesn't commit."""
+    # flush to get repo ids of new repos
+    db.session.flush()
+    counts = Counter()
+    for launch in launches:
+        counts[(launch.repo_id, launch.origin, launch.timestamp)] += 1
+    add_launch_counts(counts)
+
+
+def validate_launch_spec(launch):
+    """Raises ValueError if provider and spec of launch can't be parsed into a repo,
+    such launches can't be saved."""
+    try:
+        get_namespace_fields(launch.provider_namespace)
+    except KeyError as e:
+        raise ValueError(f"Unknown provider {e}")
+    except ValueError:
+        raise ValueError(f"Invalid spec {launch.spec} for provider {launch.provider}")
+
+
+def add_launches(launches):
+    """Adds new launches into session and links them to their repos.
+    Existing repos are fetched with one query per chunk of provider namespaces and missing repos are created.
+    Last ref of a repo is taken from its last launch in given list. Doesn't commit.
+    Descriptions of repos can be refreshed after commit with `descriptions.enqueue_description_refresh`.
+
+    :param launches: list of BinderLaunch objects
+    :return: dict of provider_namespace -> Repo
+    """
+    provider_namespaces = {}
+    for launch in launches:
+        provider_namespaces.setdefault(launch.provider_namespace, []).append(launch)
+
+    repos = {}
+    names = list(provider_namespaces)
+    for i in range(0, len(names), CHUNK_SIZE):
+        for repo in Repo.query.filter(Repo.provider_namespace.in_(names[i:i+CHUNK_SIZE])).all():
+            repos[repo.provider_namespace] = repo
+
+    for provider_namespace, _launches in provider_namespaces.items():
+        repo = repos.get(provider_namespace)
+        last_ref = _launches[-1].ref
+        if repo:
+            repo.last_ref = last_ref
+        else:
+            repo = Repo(provider_namespace=provider_namespace, description="", last_ref=last_ref)
+            db.session.add(repo)
+            repos[provider_namespace] = repo
+        for launch in _launches:
+            launch.detail = repo
+    db.session.add_all(launches)
+    update_launch_counts(launches)
+    return repos
+
+
+def discount_launches(query):
+    """Subtracts launches of given BinderLaunch query from launch count rollups.
+    It must be called before launches are deleted. Doesn't commit."""
+    rows = query.\
+           with_entities(BinderLaunch.repo_id, BinderLaunch.origin, BinderLaunch.timestamp,
+                         func.count(BinderLaunch.id)).\
+           group_by(BinderLaunch.repo_id, BinderLaunch.origin, BinderLaunch.timestamp).\
+           order_by(None).\
+           all()
+    add_launch_counts({(repo_id, origin, timestamp): -count for repo_id, origin, timestamp, count in rows})
+
+
+def get_bucket_expression(column, unit):
+    """Returns an sql expression which truncates given datetime column to hour, day, week (starts on Monday)
+    or month."""
+    if db.engine.dialect.name == 'sqlite':
+        # same format as sqlalchemy stores datetimes in sqlite, so that comparisons work
+        if unit == 'hour':
+            return func.strftime(literal_column("'%Y-%m-%d %H:00:00.000000'"), column)
+        if unit == 'week':
+            # next sunday (or same day) and then back to monday
+            return func.strftime(literal_column("'%Y-%m-%d 00:00:00.000000'"), column,
+                                 literal_column("'weekday 0'"), literal_column("'-6 days'"))
+        fmt = '%Y-%m-01 00:00:00.000000' if unit == 'month' else '%Y-%m-%d 00:00:00.000000'
+        return func.strftime(literal_column(f"'{fmt}'"), column)
+    # literal unit, otherwise postgres doesn't match expressions in select and group by
+    return func.date_trunc(literal_column(f"'{unit}'"), column)
+
+
+def rebuild_launch_counts():
+    """Re-creates launch count rollups and launch counters of repos from BinderLaunch table."""
+    for model, unit in zip(LAUNCH_COUNT_MODELS, ['hour', 'day']):
+        model.query.delete(synchronize_session=False)
+        bucket = get_bucket_expression(BinderLaunch.timestamp, unit)
+        origin = func.coalesce(BinderLaunch.origin, literal_column("''"))
+        query = BinderLaunch.query.\
+                with_entities(BinderLaunch.repo_id, origin, bucket, func.count(BinderLaunch.id)).\
+                filter(BinderLaunch.repo_id.isnot(None)).\
+                group_by(BinderLaunch.repo_id, origin, bucket)
+        table = model.__table__
+        db.session.execute(table.insert().from_select(['repo_id', 'origin', 'bucket', 'launch_count'],
+                                                      query.statement))
+    rebuild_repo_counters(db.session)
+    rebuild_origin_counts(db.session)
+    db.session.commit()
+
+
+def rebuild_repo_counters(connection):
+    """Re-creates launch counters of repos and launch counts per origin from BinderLaunch table
+    and hourly launch count rollups. Doesn't commit.
+
+    :param connection: db.session or a connection, e.g. of a migration
+    """
+    repo = Repo.__table__
+    origin_table = OriginLaunchCount.__table__
+    launch = BinderLaunch.__table__
+    hourly = HourlyLaunchCount.__table__
+    connection.execute(origin_table.delete())
+    origin = func.coalesce(launch.c.origin, literal_column("''"))
+    connection.execute(origin_table.insert().from_select(
+        ['repo_id', 'origin', 'launch_count'],
+        select([launch.c.repo_id, origin, func.count(launch.c.id)]).
+        where(launch.c.repo_id.isnot(None)).
+        group_by(launch.c.repo_id, origin)))
+
+    def repo_launches(column):
+        return select([column]).where(launch.c.repo_id == repo.c.id).as_scalar()
+    connection.execute(repo.update().values(
+        launch_count=func.coalesce(select([func.sum(origin_table.c.launch_count)]).
+                                   where(origin_table.c.repo_id == repo.c.id).as_scalar(), 0),
+        first_launch=repo_launches(func.min(launch.c.timestamp)),
+        last_launch=repo_launches(func.max(launch.c.timestamp)),
+        trending_score=None))
+
+    scores = {}
+    rows = connection.execute(select([hourly.c.repo_id, hourly.c.bucket, hourly.c.launch_count]).
+                              order_by(hourly.c.repo_id, hourly.c.bucket))
+    for repo_id, bucket, launch_count in rows:
+        scores[repo_id] = add_trending_score(scores.get(repo_id), bucket, launch_count)
+    scores = [{'b_id': repo_id, 'b_trending_score': score} for repo_id, score in scores.items()]
+    statement = repo.update().\
+        where(repo.c.id == bindparam('b_id')).\
+        values(trending_score=bindparam('b_trending_score'))
+    for i in range(0, len(scores), CHUNK_SIZE):
+        connection.execute(statement, scores[i:i+CHUNK_SIZE])
+
+
+def rebuild_origin_counts(connection):
+    """Re-creates total launch counts per origin from BinderLaunch table. Doesn't commit.
+
+    :param connection: db.session or a connection, e.g. of a migration
+    """
+    table = TotalLaunchCount.__table__
+    launch = BinderLaunch.__table__
+    connection.execute(table.delete())
+    origin = func.coalesce(launch.c.origin, literal_column("''"))
+    connection.execute(table.insert().from_select(
+        ['origin', 'launch_count'],
+        select([origin, func.count(launch.c.id)]).group_by(origin)))
+
+
+@cache.memoize(timeout=app.config['ORIGINS_CACHE_TIMEOUT'])
+def get_origin_counts(from_date=None, to_date=None):
+    """Returns list of (origin, launch count) ordered by origin.
+    Counts of all time are read from total launch counts per origin, otherwise they are summed over
+    daily launch count rollups, which don't count launches without a repo.
+
+    :param from_date: first day (date) or None for all time
+    :param to_date: last day (date), inclusive, or None for until now
+    """
+    if from_date is None and to_date is None:
+        query = TotalLaunchCount.query.\
+                with_entities(TotalLaunchCount.origin, TotalLaunchCount.launch_count).\
+                order_by(TotalLaunchCount.origin)
+        return [tuple(row) for row in query.all()]
+    launch_count = func.sum(DailyLaunchCount.launch_count)
+    query = DailyLaunchCount.query.\
+            with_entities(DailyLaunchCount.origin, launch_count).\
+            group_by(DailyLaunchCount.origin).\
+            order_by(DailyLaunchCount.origin)
+    if from_date is not None:
+        query = query.filter(DailyLaunchCount.bucket >= datetime.combine(from_date, datetime.min.time()))
+    if to_date is not None:
+        query = query.filter(DailyLaunchCount.bucket < datetime.combine(to_date, datetime.min.time()) +
+                             timedelta(days=1))
+    return [(origin, int(count)) for origin, count in query.all()]
+
+
 # def get_launch_count():
 #     return db.session.execute(
 #         db.session.query(
@@ -157,12 +808,95 @@ def get_launches(from_dt, to_dt=None, origin=None):
 #     ).scalar()
 
 
+def get_stats_bucket(timestamp, unit):
+    """Truncates given datetime to the beginning of its hour, day, week (starts on Monday) or month,
+    same as `get_bucket_expression`."""
+    if unit == 'hour':
+        return HourlyLaunchCount.get_bucket(timestamp)
+    bucket = DailyLaunchCount.get_bucket(timestamp)
+    if unit == 'week':
+        return bucket - timedelta(days=bucket.weekday())
+    if unit == 'month':
+        return bucket.replace(day=1)
+    return bucket
+
+
+def get_next_stats_bucket(bucket, unit):
+    if unit == 'month':
+        return bucket.replace(year=bucket.year + bucket.month // 12, month=bucket.month % 12 + 1)
+    return bucket + timedelta(**{f'{unit}s': 1})
+
+
+def _get_launch_stats(unit, start, stop, origin=None, provider=None, repo_id=None):
+    """Returns {bucket: launch count} of buckets in [start, stop) from launch count rollups."""
+    model = HourlyLaunchCount if unit == 'hour' else DailyLaunchCount
+    bucket = get_bucket_expression(model.bucket, unit)
+    query = model.query.\
+            with_entities(bucket, func.sum(model.launch_count)).\
+            filter(model.bucket >= start, model.bucket < stop).\
+            group_by(bucket)
+    if origin is not None:
+        query = query.filter(model.origin == origin)
+    if provider is not None:
+        query = query.join(Repo, Repo.id == model.repo_id).filter(Repo.provider == provider)
+    if repo_id is not None:
+        query = query.filter(model.repo_id == repo_id)
+    # sqlite returns buckets as strings
+    return {b if isinstance(b, datetime) else datetime.fromisoformat(b): int(count) for b, count in query.all()}
+
+
+def get_launch_stats(unit, from_dt, to_dt=None, origin=None, provider=None, repo_id=None):
+    """Returns launch counts per hour, day, week or month in given time range, including buckets without launches.
+    Buckets of from_dt and to_dt are included. Counts are computed from launch count rollups,
+    so launches without a repo are not counted.
+    Result is cached per bucket: for STATS_CACHE_TIMEOUT seconds if it contains the current bucket,
+    for STATS_CLOSED_CACHE_TIMEOUT seconds if all buckets are over.
+    Raises ValueError if time range is not valid or has more than STATS_MAX_BUCKETS buckets.
+
+    :param unit: hour, day, week or month
+    :param to_dt: end of time range (datetime) or None for until now
+    :return: list of (bucket, launch count) ordered by bucket
+    """
+    current_bucket = get_stats_bucket(datetime.utcnow(), unit)
+    if to_dt is not None and from_dt > to_dt:
+        raise ValueError("Beginning of time range must be before its end")
+    start = get_stats_bucket(from_dt, unit)
+    stop = get_next_stats_bucket(get_stats_bucket(to_dt, unit) if to_dt is not None else current_bucket, unit)
+    buckets = []
+    bucket = start
+    while bucket < stop:
+        if len(buckets) == app.config['STATS_MAX_BUCKETS']:
+            raise ValueError(f"Time range is too long, max {len(buckets)} buckets are allowed")
+        buckets.append(bucket)
+        bucket = get_next_stats_bucket(bucket, unit)
+
+    key = f"launch_stats/{unit}/{start.isoformat()}/{stop.isoformat()}/{origin}/{provider}/{repo_id}"
+    stats = cache.get(key)
+    if stats is None:
+        counts = _get_launch_stats(unit, start, stop, origin, provider, repo_id)
+        stats = [(bucket, counts.get(bucket, 0)) for bucket in buckets]
+        timeout = app.config['STATS_CACHE_TIMEOUT'] if stop > current_bucket else \
+            app.config['STATS_CLOSED_CACHE_TIMEOUT']
+        cache.set(key, stats, timeout=timeout)
+    return stats
+
+
+def get_launch_timestamp_query(origins=None, last=False):
+    """Returns query of timestamp of first (or last) launch of given origins (None for all origins).
+    Each origin is queried separately, so that its launches are read in order of (origin, timestamp) index,
+    instead of sorting all launches of origins.
+    """
+    aggregate = func.max if last else func.min
+    if origins is None:
+        return db.session.query(aggregate(BinderLaunch.timestamp))
+    queries = [db.session.query(aggregate(BinderLaunch.timestamp).label('timestamp')).
+               filter(BinderLaunch.origin == origin)
+               for origin in origins]
+    subquery = queries[0].union_all(*queries[1:]).subquery()
+    return db.session.query(aggregate(subquery.c.timestamp))
+
+
 @cache.memoize(timeout=None)
 def get_first_launch_ts(binder):
-    query = BinderLaunch.query.\
-            with_entities(BinderLaunch.timestamp).\
-            order_by(BinderLaunch.timestamp)
-    if binder != "all":
-        query = query.filter(BinderLaunch.origin.in_(app.binder_origins[binder]['origins']))
-    first_launch = query.first()
-    return first_launch[0] if first_launch else None
+    origins = None if binder == "all" else app.binder_origins[binder]['origins']
+    return get_launch_timestamp_query(origins).scalar()
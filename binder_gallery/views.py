@@ -1,40 +1,17 @@
-import requests
-from flask import render_template, abort, make_response, request
-from .utilities_db import get_all_projects, get_popular_repos, get_first_launch_ts
-from . import app, cache
-
-
-@cache.cached(timeout=300, key_prefix='binder_versions')
-def get_binder_versions(binders):
-    main_versions = None
-    for binder in binders:
-        # lasts ~0.3 seconds per binder
-        try:
-            response = requests.get(binder['url'] + '/versions', timeout=0.5)
-            if response.status_code == 200:
-                versions = response.json()
-                versions = f"BinderHub {versions['binderhub']} with {versions['builder']}"
-                binder['versions'] = versions
-                if binder.get('main', 'false') == 'true':
-                    # get versions of main binder. other binders will be checked against this to decide if up-to-date
-                    main_versions = versions
-        except Exception as e:
-            # if fail, last fetched version info (of this binder) is displayed
-            app.logger.error(f"Error: fetching version of {binder['name']} failed: {e}")
-    # check if up-to-date
-    for binder in binders:
-        binder['versions'] = binder['versions'].rstrip('.')
-        if main_versions is not None and binder.get('main', 'false') != 'true' and binder['versions'] == main_versions:
-            binder['versions'] = binder['versions'] + '.'
-    return binders
+from flask import render_template, abort, make_response, request, jsonify
+from .utilities_db import get_all_projects, get_popular_repos, get_first_launch_ts, filter_popular_repos, \
+    get_top_repos
+from .binder_versions import get_binder_versions
+from .page_cache import cached_page
+from .repo_search import search_repos, MIN_TERM_LENGTH
+from . import app
 
 
 def get_binders(fetch_versions=True):
     binders = app.binders
-    # first fetch versions, because it is cached and otherwise cached value overwrites the selected info
     if fetch_versions is True:
         binders = get_binder_versions(binders)
-    # then set selected binder
+    # set selected binder
     selected_binder = request.cookies.get('selected_binder') or app.default_binder_url
     for binder in binders:
         binder['selected'] = 'false'
@@ -81,6 +58,7 @@ def select_binder():
 
 
 @app.route('/')
+@cached_page
 def gallery():
     popular_repos_all_binders = {}
     for b_name, b_data in app.binder_origins.items():
@@ -91,12 +69,12 @@ def gallery():
             if not i_data["show"]:
                 continue
             if i_data.get("load_dynamic", False):
-                popular_repos_all.append((time_range, i_data["title"], [], 0, True))
+                popular_repos_all.append((time_range, i_data["title"], [], 0, 0, True))
             else:
-                popular_repos = get_popular_repos(b_name, time_range)
-                if popular_repos:
-                    total_launches = sum([l[-1] for l in popular_repos])
-                    popular_repos_all.append((time_range, i_data["title"], popular_repos, total_launches, False))
+                top_repos, repos_length, total_launches = get_top_repos(b_name, time_range)
+                if top_repos:
+                    popular_repos_all.append((time_range, i_data["title"], top_repos, repos_length,
+                                              total_launches, False))
         if popular_repos_all:
             popular_repos_all_binders[b_name] = [b_data['title'],
                                                  popular_repos_all,
@@ -111,11 +89,16 @@ def gallery():
     return render_template('gallery.html', **context)
 
 
+def is_detail_page(binder, time_range):
+    return (binder in app.binder_origins or binder == 'all') \
+        and time_range in app.detail_pages \
+        and app.detail_pages[time_range]['show']
+
+
 @app.route('/<string:binder>/<string:time_range>/')
+@cached_page
 def view_all(binder, time_range):
-    if (binder not in app.binder_origins and binder != 'all') \
-       or time_range not in app.detail_pages\
-       or not app.detail_pages[time_range]['show']:
+    if not is_detail_page(binder, time_range):
         abort(404)
     if binder == 'all':
         title = app.detail_pages[time_range]['title']
@@ -127,24 +110,63 @@ def view_all(binder, time_range):
     popular_repos = get_popular_repos(binder, time_range)
     total_launches = sum([l[-1] for l in popular_repos])
     context.update({'active': 'gallery',
+                    'binder': binder,
                     'time_range': time_range,
                     'title': title,
                     'binders': get_binders(),
                     'first_launch_ts': get_first_launch_ts(binder),
                     'total_launches': total_launches,
-                    'popular_repos': popular_repos})
+                    # rows are fetched by DataTables from view_all_data
+                    'repos_length': len(popular_repos)})
     return render_template('view_all.html', **context)
 
 
+# columns of DataTables in view_all.html -> index of column in popular repos
+VIEW_ALL_COLUMNS = {0: 0, 1: 1, 2: 2, 3: 6}
+
+
+@app.route('/<string:binder>/<string:time_range>/data/')
+def view_all_data(binder, time_range):
+    """Returns popular repos for DataTables in view_all page.
+    It implements server-side processing protocol: https://datatables.net/manual/server-side
+    """
+    if not is_detail_page(binder, time_range):
+        abort(404)
+    try:
+        draw = int(request.args.get('draw', 0))
+        start = max(int(request.args.get('start', 0)), 0)
+        length = int(request.args.get('length', 10))
+        order_column = int(request.args.get('order[0][column]', 3))
+    except ValueError:
+        abort(400)
+    if order_column not in VIEW_ALL_COLUMNS:
+        abort(400)
+    order_desc = request.args.get('order[0][dir]', 'desc') == 'desc'
+    if length < 0 or length > 100:
+        # -1 is for all rows, but at most 100 rows are returned at once
+        length = 100
+
+    popular_repos = get_popular_repos(binder, time_range)
+    filtered_repos = filter_popular_repos(popular_repos, request.args.get('search[value]'),
+                                          VIEW_ALL_COLUMNS[order_column], order_desc)
+    data = [{'repo_name': r[0], 'org': r[1], 'provider': r[2], 'repo_url': r[3], 'binder_url': r[4],
+             'description': r[5], 'launches': r[6]}
+            for r in filtered_repos[start:start + length]]
+    return jsonify({'draw': draw,
+                    'recordsTotal': len(popular_repos),
+                    'recordsFiltered': len(filtered_repos),
+                    'data': data})
+
+
 @app.route('/table/<string:binder>/<string:time_range>/')
+@cached_page
 def table(binder, time_range):
     if binder not in app.binder_origins \
        or time_range not in app.binder_origins[binder]["intervals"] \
        or not app.binder_origins[binder]["intervals"][time_range]['show']:
         abort(404)
 
-    popular_repos = get_popular_repos(binder, time_range)
-    total_launches = sum([l[-1] for l in popular_repos])
+    top_repos, repos_length, total_launches = get_top_repos(binder, time_range)
 
     context = get_default_template_context()
     context.update({'active': 'gallery',
@@ -155,12 +177,26 @@ def table(binder, time_range):
                     'launch': True,
                     'first_launch_ts': get_first_launch_ts(binder),
                     'total_launches': total_launches,
-                    'repos': popular_repos[:5],
-                    'repos_length': len(popular_repos),
+                    'repos': top_repos,
+                    'repos_length': repos_length,
                     })
     return render_template('table.html', **context)
 
 
+@app.route('/search/')
+def search():
+    # not cached_page, its cache key doesn't include the query string, search results are memoized instead
+    query = request.args.get('q', '').strip()
+    context = get_default_template_context()
+    context.update({'active': 'gallery',
+                    'query': query,
+                    'repos': search_repos(query, 50) if query else [],
+                    'min_term_length': MIN_TERM_LENGTH,
+                    'binders': get_binders(),
+                    })
+    return render_template('search.html', **context)
+
+
 @app.errorhandler(404)
 def not_found(error):
     context = get_default_template_context()
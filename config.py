@@ -15,6 +15,15 @@ class Config(object):
     # This requires extra memory and can be disabled if not needed.
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Flask-Caching config: https://flask-caching.readthedocs.io/en/latest/#configuring-flask-caching
+    # "filesystem": shared by all processes on the same host
+    # "binder_gallery.cache_backends.lru": in-process LRU cache with at most CACHE_THRESHOLD items,
+    #     each process (e.g. gunicorn worker) has its own cache
+    # "redis": shared by all processes, set CACHE_REDIS_URL (e.g. "redis://localhost:6379/0")
+    CACHE_TYPE = "filesystem"
+    CACHE_DIR = os.path.join(basedir, "bg_cache")
+    CACHE_THRESHOLD = 500
+
     # binder gallery config
     BASE_URL = os.getenv("BG_BASE_URL", "/")
     # list of binders. default is GESIS binder.
@@ -57,6 +66,44 @@ class Config(object):
 
     TEMPLATE_VARS = template_vars
 
+    # number of threads for background tasks, e.g. fetching repo descriptions.
+    # 0 runs tasks immediately in the calling thread.
+    BACKGROUND_WORKERS = 2
+    # a repo description is scraped at most once in this period (in seconds)
+    DESCRIPTION_REFRESH_TTL = 24 * 60 * 60
+    # versions of binders are refreshed in background when they are older than this (in seconds)
+    BINDER_VERSIONS_TTL = 300
+    BINDER_VERSIONS_TIMEOUT = 2
+    # a binder is skipped for BINDER_VERSIONS_RETRY_AFTER seconds
+    # after fetching its versions fails BINDER_VERSIONS_MAX_FAILURES times in a row
+    BINDER_VERSIONS_MAX_FAILURES = 3
+    BINDER_VERSIONS_RETRY_AFTER = 30 * 60
+    # popular repos of a time range are computed at most once in given bucket size (in seconds).
+    # when a bucket is over, result of the previous bucket is served until the new one is computed in background.
+    POPULAR_REPOS_BUCKETS = {'24h': 60, '7d': 10 * 60, '30d': 10 * 60, '60d': 10 * 60, 'all': 60 * 60}
+    # weight of a launch in trending score of a repo halves in this period (in seconds)
+    TRENDING_HALF_LIFE = 24 * 60 * 60
+    # write-behind mode of launch POSTs: if a path is set, launches are appended to this local spool (sqlite)
+    # and POSTs return 202. spooled launches are saved into database in batches of LAUNCH_SPOOL_FLUSH_SIZE,
+    # every LAUNCH_SPOOL_FLUSH_INTERVAL seconds or as soon as a batch is full.
+    # e.g. BG_LAUNCH_SPOOL_PATH=launch_spool.sqlite (ignored by git)
+    LAUNCH_SPOOL_PATH = os.getenv("BG_LAUNCH_SPOOL_PATH")
+    LAUNCH_SPOOL_FLUSH_INTERVAL = 0.2
+    LAUNCH_SPOOL_FLUSH_SIZE = 500
+    # launch counts per origin (/api/v1.0/launches/origins/) are cached for this period (in seconds)
+    ORIGINS_CACHE_TIMEOUT = 10
+    # launch statistics (/api/v1.0/stats/) are cached for this period (in seconds),
+    # or for STATS_CLOSED_CACHE_TIMEOUT if the current bucket is not in the time range
+    STATS_CACHE_TIMEOUT = 60
+    STATS_CLOSED_CACHE_TIMEOUT = 24 * 60 * 60
+    # max number of buckets in a response of launch statistics
+    STATS_MAX_BUCKETS = 1000
+    # rendered pages are cached for this period (in seconds), until launches of archives are parsed
+    # or until popular repos shown on the page change, which is checked once per bucket (see POPULAR_REPOS_BUCKETS)
+    PAGE_CACHE_TIMEOUT = 60
+    # directory of parquet files exported by `flask export-launches-parquet`
+    PARQUET_EXPORT_DIR = os.path.join(basedir, "launches_parquet")
+
     # flask builtin config: http://flask.pocoo.org/docs/1.0/config/#builtin-configuration-values
     SECRET_KEY = "development-secret"
     APPLICATION_ROOT = BASE_URL
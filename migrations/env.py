@@ -65,6 +65,15 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # search index of repos, i.e. full-text search table and its shadow tables (sqlite)
+    # or trigram index (postgresql), is not in models, it is created by a migration, see `repo_search.py`
+    def include_object(object, name, type_, reflected, compare_to):
+        if type_ == 'table' and name.startswith('repo_search'):
+            return False
+        if type_ == 'index' and name == 'ix_repo_search_trgm':
+            return False
+        return True
+
     engine = engine_from_config(config.get_section(config.config_ini_section),
                                 prefix='sqlalchemy.',
                                 poolclass=pool.NullPool)
@@ -73,6 +82,7 @@ def run_migrations_online():
     context.configure(connection=connection,
                       target_metadata=target_metadata,
                       process_revision_directives=process_revision_directives,
+                      include_object=include_object,
                       **current_app.extensions['migrate'].configure_args)
     
     try:
@@ -0,0 +1,35 @@
+"""Helpers for migrations of indexes of binder_launch partitions.
+
+Migrations depend on the behaviour of these helpers as it is, so don't change them,
+add a new helper for new behaviour instead. Application code must not use them.
+"""
+from alembic import op
+
+
+def get_partitions():
+    """Returns names of existing (yearly) partitions of binder_launch table in postgresql."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return []
+    rows = op.get_bind().execute("SELECT c.relname FROM pg_inherits i "
+                                 "JOIN pg_class c ON c.oid = i.inhrelid "
+                                 "JOIN pg_class p ON p.oid = i.inhparent "
+                                 "WHERE p.relname = 'binder_launch'")
+    return [row[0] for row in rows]
+
+
+def replace_partition_indexes(add, drop):
+    """Creates and drops indexes of existing partitions of binder_launch table.
+
+    :param add: list of column lists of indexes to create
+    :param drop: list of column lists of indexes to drop
+    """
+    # partitions created later copy indexes of parent table (LIKE ... INCLUDING INDEXES),
+    # but indexes of existing partitions must be created and dropped manually.
+    # names are the same as postgresql gives to copied indexes.
+    for partition in get_partitions():
+        for columns in add:
+            quoted_columns = ", ".join('"%s"' % c for c in columns)
+            op.execute(f'CREATE INDEX IF NOT EXISTS {partition}_{"_".join(columns)}_idx '
+                       f'ON {partition} ({quoted_columns})')
+        for columns in drop:
+            op.execute(f'DROP INDEX IF EXISTS {partition}_{"_".join(columns)}_idx')
@@ -0,0 +1,108 @@
+"""empty message
+
+Revision ID: 1faca0d8e8bc
+Revises: 7a682a594e53
+Create Date: 2026-10-18 11:23:48.827013
+
+"""
+from datetime import datetime
+from math import log2
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1faca0d8e8bc'
+down_revision = '7a682a594e53'
+branch_labels = None
+depends_on = None
+
+# tables and trending score as they are at this revision,
+# so that result of this migration doesn't change when application code changes
+repo = sa.table('repo', sa.column('id', sa.Integer), sa.column('launch_count', sa.Integer),
+                sa.column('first_launch', sa.DateTime), sa.column('last_launch', sa.DateTime),
+                sa.column('trending_score', sa.Float))
+launch = sa.table('binder_launch', sa.column('id', sa.Integer), sa.column('repo_id', sa.Integer),
+                  sa.column('origin', sa.String), sa.column('timestamp', sa.DateTime))
+origin_table = sa.table('launch_count_origin', sa.column('repo_id', sa.Integer), sa.column('origin', sa.String),
+                        sa.column('launch_count', sa.Integer))
+hourly = sa.table('launch_count_hourly', sa.column('repo_id', sa.Integer), sa.column('bucket', sa.DateTime),
+                  sa.column('launch_count', sa.Integer))
+EPOCH = datetime(1970, 1, 1)
+
+
+def add_trending_score(score, timestamp, count):
+    """Adds positive count of launches at timestamp to trending score."""
+    weight = (timestamp - EPOCH).total_seconds() / current_app.config['TRENDING_HALF_LIFE'] + log2(count)
+    if score is None:
+        return weight
+    return max(score, weight) + log2(1 + 2 ** -abs(score - weight))
+
+
+def rebuild_repo_counters(connection):
+    origin = sa.func.coalesce(launch.c.origin, sa.literal_column("''"))
+    connection.execute(origin_table.insert().from_select(
+        ['repo_id', 'origin', 'launch_count'],
+        sa.select([launch.c.repo_id, origin, sa.func.count(launch.c.id)]).
+        where(launch.c.repo_id.isnot(None)).
+        group_by(launch.c.repo_id, origin)))
+
+    def repo_launches(column):
+        return sa.select([column]).where(launch.c.repo_id == repo.c.id).as_scalar()
+    connection.execute(repo.update().values(
+        launch_count=sa.func.coalesce(sa.select([sa.func.sum(origin_table.c.launch_count)]).
+                                      where(origin_table.c.repo_id == repo.c.id).as_scalar(), 0),
+        first_launch=repo_launches(sa.func.min(launch.c.timestamp)),
+        last_launch=repo_launches(sa.func.max(launch.c.timestamp))))
+
+    scores = {}
+    rows = connection.execute(sa.select([hourly.c.repo_id, hourly.c.bucket, hourly.c.launch_count]).
+                              where(hourly.c.launch_count > 0).
+                              order_by(hourly.c.repo_id, hourly.c.bucket))
+    for repo_id, bucket, launch_count in rows:
+        scores[repo_id] = add_trending_score(scores.get(repo_id), bucket, launch_count)
+    scores = [{'b_id': repo_id, 'b_trending_score': score} for repo_id, score in scores.items()]
+    statement = repo.update().\
+        where(repo.c.id == sa.bindparam('b_id')).\
+        values(trending_score=sa.bindparam('b_trending_score'))
+    for i in range(0, len(scores), 1000):
+        connection.execute(statement, scores[i:i+1000])
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('launch_count_origin',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('repo_id', sa.Integer(), nullable=False),
+    sa.Column('origin', sa.String(), server_default='', nullable=False),
+    sa.Column('launch_count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['repo_id'], ['repo.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('repo_id', 'origin')
+    )
+    op.add_column('repo', sa.Column('first_launch', sa.DateTime(), nullable=True))
+    op.add_column('repo', sa.Column('last_launch', sa.DateTime(), nullable=True))
+    op.add_column('repo', sa.Column('launch_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('repo', sa.Column('trending_score', sa.Float(), nullable=True))
+    # ### end Alembic commands ###
+
+    # fill counters of existing repos
+    rebuild_repo_counters(op.get_bind())
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_index(op.f('ix_repo_launch_count'), 'repo', ['launch_count'], unique=False)
+    op.create_index(op.f('ix_repo_trending_score'), 'repo', ['trending_score'], unique=False)
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_index(op.f('ix_repo_trending_score'), table_name='repo')
+    op.drop_index(op.f('ix_repo_launch_count'), table_name='repo')
+    op.drop_column('repo', 'trending_score')
+    op.drop_column('repo', 'launch_count')
+    op.drop_column('repo', 'last_launch')
+    op.drop_column('repo', 'first_launch')
+    op.drop_table('launch_count_origin')
+    # ### end Alembic commands ###
@@ -0,0 +1,114 @@
+"""empty message
+
+Revision ID: 7a682a594e53
+Revises: 4edaeb59594d
+Create Date: 2026-10-18 11:19:26.010662
+
+"""
+from urllib.parse import unquote
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a682a594e53'
+down_revision = '4edaeb59594d'
+branch_labels = None
+depends_on = None
+
+# frozen copy of `binder_gallery.models.get_namespace_fields` at this revision,
+# so that result of this migration doesn't change when application code changes
+PROVIDER_PREFIXES = {'Git': 'git', 'Gist': 'gist', 'GitHub': 'gh', 'GitLab': 'gl', 'Zenodo': 'zenodo',
+                     'Figshare': 'figshare', 'Hydroshare': 'hydroshare', 'Dataverse': 'dataverse'}
+
+
+def _strip(type_, text, affixes):
+    for affix in affixes:
+        if type_ == 'prefix' and text.startswith(affix):
+            text = text[len(affix):]
+        elif type_ == 'suffix' and text.endswith(affix):
+            text = text[:-(len(affix))]
+    return text
+
+
+def get_namespace_fields(provider_namespace):
+    for provider_name, prefix in PROVIDER_PREFIXES.items():
+        if provider_namespace.startswith(prefix+'/'):
+            break
+    else:
+        raise ValueError(f'{provider_namespace} is not valid.')
+    spec = provider_namespace[len(prefix+'/'):]
+    if prefix in ['zenodo', 'figshare', 'dataverse']:
+        org, repo_name, repo_url = '', spec, f"https://doi.org/{spec}"
+    elif prefix == 'hydroshare':
+        resource_id = spec.split("/")[-1].split(".")[-1]
+        org, repo_name, repo_url = '', resource_id, f"https://www.hydroshare.org/resource/{resource_id}"
+    else:
+        # namespace has no ref, add a placeholder to parse it as a spec
+        spec += '/master'
+        if prefix == 'git':
+            repo_url = unquote(spec.rsplit('/', 1)[0])
+            org = ''
+            repo_name = _strip('suffix', _strip('prefix', repo_url, ['https://', 'http://']), ['.git'])
+        elif prefix == 'gh':
+            org, repo_name, _ = spec.split('/', 2)
+            repo_name = _strip('suffix', repo_name, ['.git'])
+            repo_url = f'https://www.github.com/{org}/{repo_name}'
+        elif prefix == 'gl':
+            quoted_namespace, _ = spec.split('/', 1)
+            org, repo_name = unquote(quoted_namespace).split('/', 1)
+            repo_name = _strip('suffix', repo_name, ['.git'])
+            repo_url = f'https://www.gitlab.com/{org}/{repo_name}'
+        else:
+            # gist
+            org, repo_name = spec.split('/', 2)[:2]
+            repo_url = f'https://gist.github.com/{org}/{repo_name}'
+    return {'provider': provider_name, 'org': org, 'repo_name': repo_name, 'repo_url': repo_url}
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.add_column('repo', sa.Column('org', sa.String(), nullable=True))
+    op.add_column('repo', sa.Column('provider', sa.String(), nullable=True))
+    op.add_column('repo', sa.Column('repo_name', sa.String(), nullable=True))
+    op.add_column('repo', sa.Column('repo_url', sa.String(), nullable=True))
+    # ### end Alembic commands ###
+
+    # fill new columns of existing repos
+    connection = op.get_bind()
+    repo = sa.table('repo', sa.column('id', sa.Integer), sa.column('provider_namespace', sa.String),
+                    sa.column('provider', sa.String), sa.column('org', sa.String),
+                    sa.column('repo_name', sa.String), sa.column('repo_url', sa.String))
+    values = []
+    for repo_id, provider_namespace in connection.execute(sa.select([repo.c.id, repo.c.provider_namespace])):
+        try:
+            fields = get_namespace_fields(provider_namespace)
+        except ValueError:
+            # invalid namespace, columns stay empty
+            continue
+        values.append({f'b_{column}': value for column, value in fields.items()})
+        values[-1]['b_id'] = repo_id
+    statement = repo.update().\
+        where(repo.c.id == sa.bindparam('b_id')).\
+        values(provider=sa.bindparam('b_provider'), org=sa.bindparam('b_org'),
+               repo_name=sa.bindparam('b_repo_name'), repo_url=sa.bindparam('b_repo_url'))
+    for i in range(0, len(values), 1000):
+        connection.execute(statement, values[i:i+1000])
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_index(op.f('ix_repo_org'), 'repo', ['org'], unique=False)
+    op.create_index(op.f('ix_repo_provider'), 'repo', ['provider'], unique=False)
+    op.create_index(op.f('ix_repo_repo_name'), 'repo', ['repo_name'], unique=False)
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_index(op.f('ix_repo_repo_name'), table_name='repo')
+    op.drop_index(op.f('ix_repo_provider'), table_name='repo')
+    op.drop_index(op.f('ix_repo_org'), table_name='repo')
+    op.drop_column('repo', 'repo_url')
+    op.drop_column('repo', 'repo_name')
+    op.drop_column('repo', 'provider')
+    op.drop_column('repo', 'org')
+    # ### end Alembic commands ###
@@ -0,0 +1,73 @@
+"""empty message
+
+Revision ID: d72d63e1f6e4
+Revises: cdec886a6659
+Create Date: 2026-10-18 11:43:39.055173
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd72d63e1f6e4'
+down_revision = 'cdec886a6659'
+branch_labels = None
+depends_on = None
+
+# search index of repos as it is at this revision (see `binder_gallery.repo_search`):
+# trigram index in postgresql, FTS5 table kept in sync by triggers in sqlite
+POSTGRESQL_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX ix_repo_search_trgm ON repo "
+    "USING gin (lower(provider_namespace || ' ' || coalesce(description, '')) gin_trgm_ops)",
+]
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE repo_search USING fts5(provider_namespace, description, content='repo', content_rowid='id')",
+    "CREATE TRIGGER repo_search_insert AFTER INSERT ON repo BEGIN "
+    "INSERT INTO repo_search (rowid, provider_namespace, description) "
+    "VALUES (new.id, new.provider_namespace, new.description); END",
+    "CREATE TRIGGER repo_search_delete AFTER DELETE ON repo BEGIN "
+    "INSERT INTO repo_search (repo_search, rowid, provider_namespace, description) "
+    "VALUES ('delete', old.id, old.provider_namespace, old.description); END",
+    "CREATE TRIGGER repo_search_update AFTER UPDATE OF provider_namespace, description ON repo BEGIN "
+    "INSERT INTO repo_search (repo_search, rowid, provider_namespace, description) "
+    "VALUES ('delete', old.id, old.provider_namespace, old.description); "
+    "INSERT INTO repo_search (rowid, provider_namespace, description) "
+    "VALUES (new.id, new.provider_namespace, new.description); END",
+    # index existing repos
+    "INSERT INTO repo_search (repo_search) VALUES ('rebuild')",
+]
+POSTGRESQL_DOWNGRADE = ["DROP INDEX IF EXISTS ix_repo_search_trgm"]
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS repo_search_insert",
+    "DROP TRIGGER IF EXISTS repo_search_delete",
+    "DROP TRIGGER IF EXISTS repo_search_update",
+    "DROP TABLE IF EXISTS repo_search",
+]
+
+
+def upgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == 'postgresql':
+        statements = POSTGRESQL_UPGRADE
+    elif connection.dialect.name == 'sqlite' and \
+            connection.execute(sa.text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar():
+        statements = SQLITE_UPGRADE
+    else:
+        # without the index, repos are searched with LIKE
+        statements = []
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == 'postgresql':
+        statements = POSTGRESQL_DOWNGRADE
+    elif connection.dialect.name == 'sqlite':
+        statements = SQLITE_DOWNGRADE
+    else:
+        statements = []
+    for statement in statements:
+        op.execute(statement)
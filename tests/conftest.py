@@ -0,0 +1,37 @@
+import os
+import pytest
+
+# app is configured when binder_gallery is imported, see `flask_app.Flask`
+os.environ['BG_APPLICATION_SETTINGS'] = 'tests.conftest.Config'
+
+from config import Config as BaseConfig
+
+
+class Config(BaseConfig):
+    TESTING = True
+    SERVER_NAME = None
+    # don't write into bg_cache
+    CACHE_TYPE = "simple"
+    BACKGROUND_WORKERS = 0
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def database(request, tmp_path):
+    """Empty database with tables and indexes of models: a temporary sqlite database
+    and a postgresql database, if its url is set in TEST_POSTGRES_URL (all its tables are dropped afterwards)."""
+    from binder_gallery import app, db
+    if request.param == 'sqlite':
+        uri = "sqlite:///" + str(tmp_path / "test.sqlite")
+    else:
+        uri = os.getenv('TEST_POSTGRES_URL')
+        if not uri:
+            pytest.skip("TEST_POSTGRES_URL is not set")
+    # engine is created for the current url on first use
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    with app.app_context():
+        db.create_all()
+        try:
+            yield db
+        finally:
+            db.session.remove()
+            db.drop_all()
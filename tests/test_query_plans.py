@@ -0,0 +1,25 @@
+from binder_gallery.models import BinderLaunch
+from binder_gallery.query_plans import check_launch_queries, get_launch_queries, get_query_plan, is_full_scan, \
+    is_sort
+
+
+def test_launch_queries_use_indexes(database):
+    failed = {name: plan for name, plan, passed in check_launch_queries() if not passed}
+    assert not failed
+
+
+def test_launch_queries_dont_scan_or_sort(database):
+    for name, statement, index, ordered in get_launch_queries():
+        plan = get_query_plan(statement)
+        assert any(index in line for line in plan), (name, plan)
+        assert not any(is_full_scan(line) for line in plan), (name, plan)
+        if ordered:
+            assert not any(is_sort(line) for line in plan), (name, plan)
+
+
+def test_full_scan_and_sort_are_detected(database):
+    # there are no indexes on status and spec
+    statement = BinderLaunch.query.filter(BinderLaunch.status == 'success').order_by(BinderLaunch.spec).statement
+    plan = get_query_plan(statement)
+    assert any(is_full_scan(line) for line in plan), plan
+    assert any(is_sort(line) for line in plan), plan